@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from generate_indian_music_dataset import peak_rss_mb, write_dataset_parallel
+
+# Reproducible benchmarks of the dashboard hot paths. Catalogs are generated
+# once per size with a fixed seed and start date; each size is measured in a
+# fresh process so load time and peak memory are not skewed by earlier sizes.
+
+SIZES = [20000, 1000000, 10000000]
+SEED = 42
+START_DATE = datetime(2015, 1, 1)
+FEATURES = ['danceability', 'energy']
+SEARCH_QUERIES = ['ishk', 'tere bi', 'pyaar']  # a word, a prefix, a transliteration variant
+
+
+def catalog_path(directory, size):
+    return os.path.join(directory, f'catalog_{size}_seed{SEED}.parquet')
+
+
+def ensure_catalog(directory, size, workers=None):
+    """Path of the benchmark catalog of `size` songs, generating it if missing"""
+    path = catalog_path(directory, size)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        print(f"Generating {size:,} songs into {path}...")
+        write_dataset_parallel(path, size, workers=workers, engine='vectorized', seed=SEED,
+                               fmt='parquet', start_date=START_DATE)
+    return path
+
+
+def summarize(samples):
+    """Latency percentiles of `samples` (seconds) in milliseconds"""
+    ms = np.asarray(samples) * 1000
+    return {
+        'n': len(ms),
+        'mean': round(float(ms.mean()), 4),
+        'p50': round(float(np.percentile(ms, 50)), 4),
+        'p90': round(float(np.percentile(ms, 90)), 4),
+        'p99': round(float(np.percentile(ms, 99)), 4),
+        'min': round(float(ms.min()), 4),
+        'max': round(float(ms.max()), 4)
+    }
+
+
+def measure(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+# ========== MEASUREMENTS (run in a child process per size) ==========
+def filter_cases(dashboard):
+    """One filter state per filter type used by the dashboard, plus no filter and all combined"""
+    artist = dashboard.df['artist'].value_counts().index[0]
+    genre = dashboard.genre_index.tag_counts().index[0]
+    first = dashboard.filter_engine.sorted_dates[0]
+    # Three years that start and end mid-month, so both cube cells and edge scans are used
+    start = str(np.datetime64(first, 'D') + 400)
+    end = str(np.datetime64(first, 'D') + 400 + 3 * 365)
+    return {
+        'none': {},
+        'artist': {'artists': [artist]},
+        'genre': {'genres': [genre]},
+        'date': {'start_date': start, 'end_date': end},
+        'combined': {'artists': [artist], 'genres': [genre], 'start_date': start, 'end_date': end}
+    }
+
+
+def callback_body(output, inputs, state=()):
+    """_dash-update-component request body; `inputs`/`state` are (id, property, value)"""
+    outputs = [
+        {'id': part.rsplit('.', 1)[0], 'property': part.rsplit('.', 1)[1]}
+        for part in output.strip('.').split('...')
+    ]
+    return {
+        'output': output,
+        'outputs': outputs if len(outputs) > 1 else outputs[0],
+        'inputs': [{'id': i, 'property': p, 'value': v} for i, p, v in inputs],
+        'state': [{'id': i, 'property': p, 'value': v} for i, p, v in state],
+        'changedPropIds': [f'{inputs[0][0]}.{inputs[0][1]}']
+    }
+
+
+def apply_body(case):
+    return callback_body('selection-store.data', [('apply-button', 'n_clicks', 1)], [
+        ('artist-dropdown', 'value', case.get('artists')),
+        ('genre-dropdown', 'value', case.get('genres')),
+        ('date-range', 'start_date', case.get('start_date')),
+        ('date-range', 'end_date', case.get('end_date'))
+    ])
+
+
+def panel_bodies(staged):
+    selection = ('selection-store', 'data', staged)
+    kpis = ['kpi-total-tracks', 'kpi-avg-popularity', 'kpi-avg-duration',
+            'kpi-top-genre', 'kpi-explicit-pct', 'kpi-energy-index']
+    return {
+        'top_tracks': callback_body('top-tracks-chart-data.data', [selection]),
+        'radar': callback_body('features-radar-data.data', [selection, ('feature-dropdown', 'value', FEATURES)]),
+        'mood': callback_body('mood-chart-data.data', [selection]),
+        'trends': callback_body('trends-chart-data.data', [
+            selection, ('trends-granularity', 'value', 'month'), ('trends-metric', 'value', 'count'),
+            ('feature-dropdown', 'value', FEATURES)
+        ]),
+        'previews': callback_body('track-preview-container.children', [selection]),
+        'kpis': callback_body('..' + '...'.join(f'{k}.children' for k in kpis) + '..', [selection])
+    }
+
+
+def post(client, body):
+    response = client.post('/_dash-update-component', json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"{body['output']}: HTTP {response.status_code}")
+    return response.json
+
+
+def run(path, repeat, load_repeat):
+    """Benchmark results for the catalog at `path` (imports the dashboard in this process)"""
+    os.environ.update(CATALOG_PATH=path, CATALOG_LAZY_LOAD='0', BACKGROUND_JOBS='0')
+    for name in ('INGEST_DIR', 'RESULT_CACHE_PATH', 'SHARED_CATALOG_DIR', 'PROFILE_DIR'):
+        os.environ.pop(name, None)
+
+    started = time.perf_counter()
+    import spotifydashboard as dashboard
+    results = {'rows': len(dashboard.df), 'import_seconds': round(time.perf_counter() - started, 3)}
+    results['load_data'] = measure(lambda: dashboard.load_data(path), load_repeat)
+
+    cases = filter_cases(dashboard)
+    results['filters'] = cases
+    track = int(dashboard.rank_indexes['popularity'].top(1)[0])
+    for name, case in cases.items():
+        bitmap = dashboard.filter_engine.select_bitmap(**case)
+        results[f'filter/{name}'] = measure(lambda case=case: dashboard.filter_engine.select_bitmap(**case), repeat)
+        results[f'aggregate/{name}'] = measure(lambda case=case: dashboard.cube.query(**case), repeat)
+        results[f'kpis/{name}'] = measure(lambda case=case: dashboard.kpi_values(dashboard.cube.query(**case)), repeat)
+        results[f'top_k/{name}'] = measure(lambda bitmap=bitmap: dashboard.rank_indexes['popularity'].top(10, bitmap), repeat)
+        results[f'similar/{name}'] = measure(lambda bitmap=bitmap: dashboard.similarity_index.neighbours(track, 10, bitmap), repeat)
+        for granularity in dashboard.GRANULARITIES:
+            results[f'trends/{name}/{granularity}'] = measure(
+                lambda case=case, granularity=granularity: dashboard.trend_cube.query(**case, granularity=granularity),
+                repeat
+            )
+    popularity = dashboard.rank_indexes['popularity']
+    for query in SEARCH_QUERIES:
+        results[f'search/{query}'] = measure(lambda query=query: dashboard.search_index.search(query, popularity), repeat)
+    for kind in ('artist', 'genre'):
+        results[f'options/{kind}'] = measure(lambda kind=kind: dashboard.dropdown_options(kind, 's', None, None), repeat)
+
+    combined = cases['combined']
+    agg = dashboard.cube.query(**combined)
+    top_rows = dashboard.rank_indexes['popularity'].top(10, dashboard.filter_engine.select_bitmap(**combined))
+    results['figure/top_tracks'] = measure(lambda: dashboard.top_tracks_figure(top_rows), repeat)
+    results['figure/radar'] = measure(lambda: dashboard.radar_figure(agg, FEATURES), repeat)
+    results['figure/mood'] = measure(lambda: dashboard.mood_figure(agg), repeat)
+    results['figure/trends'] = measure(
+        lambda: dashboard.trends_figure(dashboard.normalize_selection(**combined), 'week', 'features', FEATURES), repeat
+    )
+    results['figure/previews'] = measure(lambda: dashboard.track_previews(top_rows[:3]), repeat)
+
+    # Full callbacks through Dash's request handling and callback context
+    client = dashboard.server.test_client()
+    clear_caches = lambda: [cache.clear() for cache in dashboard.panel_caches.values()]
+    for name, case in cases.items():
+        body = apply_body(case)
+        results[f'callback/apply/{name}/cold'] = measure(lambda body=body: post(client, body), repeat, clear_caches)
+    staged = post(client, apply_body(combined))['response']['selection-store']['data']
+    for panel, body in panel_bodies(staged).items():
+        results[f'callback/{panel}/cold'] = measure(lambda body=body: post(client, body), repeat, clear_caches)
+        results[f'callback/{panel}/warm'] = measure(lambda body=body: post(client, body), repeat)
+
+    results['peak_rss_mb'] = round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None
+    results['ingest_check'] = check_ingest(dashboard, cases, client)  # last: it changes the catalog
+    return results
+
+
+def same_aggregate(a, b):
+    a, b = a.to_dict(), b.to_dict()
+    return a['count'] == b['count'] and a['mood_counts'] == b['mood_counts'] \
+        and a['genre_counts'] == b['genre_counts'] \
+        and all(np.isclose(a['sums'][c], b['sums'][c], rtol=1e-6) for c in a['sums'])
+
+
+def check_ingest(dashboard, cases, client, batch_rows=11):
+    """Ingest a one-artist batch of later releases and check every filter against a reload.
+
+    The reload is the filter engine, cube, trend cube and rank index built
+    from scratch over the combined catalog. Raises if anything differs or
+    an Apply request fails; returns the number of filter states checked.
+    """
+    df = dashboard.df
+    artists = df['artist'].value_counts().index
+    batch = df[df['artist'] == artists[0]].head(batch_rows).reset_index(drop=True)
+    batch = batch.astype({c: object for c in batch.columns if str(batch[c].dtype) == 'category'})
+    last = dashboard.filter_engine.sorted_dates[-1]
+    batch['release_date'] = np.datetime64(last, 'D') + 30 + np.arange(len(batch))
+    dashboard.ingest_tracks(batch)
+
+    df = dashboard.df
+    filter_engine = dashboard.FilterEngine(df)
+    cube = dashboard.CatalogCube(df, filter_engine)
+    trend_cube = dashboard.TrendCube(df, cube, filter_engine)
+    popularity = dashboard.RankIndex(df['popularity'])
+    first = str(np.datetime64(last, 'D') - 365)
+    end = str(np.datetime64(last, 'D') + 365)
+    checks = {
+        **cases,
+        'artists': {'artists': list(artists[:2])},
+        'other_artist_date': {'artists': [artists[1]], 'start_date': first, 'end_date': end},
+        'artists_date': {'artists': list(artists[:3]), 'start_date': first, 'end_date': end},
+        'new_dates': {'start_date': first, 'end_date': end}
+    }
+    for name, case in checks.items():
+        bitmap = dashboard.filter_engine.select_bitmap(**case)
+        expected = filter_engine.select(**case)
+        problems = []
+        if not np.array_equal(dashboard.filter_engine.select(**case), expected):
+            problems.append('rows')
+        if not same_aggregate(dashboard.cube.query(**case), cube.query(**case)):
+            problems.append('aggregate')
+        if not np.array_equal(dashboard.rank_indexes['popularity'].top(10, bitmap),
+                              popularity.top(10, filter_engine.select_bitmap(**case))):
+            problems.append('top_k')
+        if not dashboard.trend_cube.query(**case).equals(trend_cube.query(**case)):
+            problems.append('trends')
+        staged = post(client, apply_body(case))['response']['selection-store']['data']
+        if staged['aggregate']['count'] != len(expected):
+            problems.append('apply')
+        if problems:
+            raise RuntimeError(f"ingest check {name}: {', '.join(problems)} differ from a reload")
+    return len(checks)
+
+
+# ========== DRIVER ==========
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(path, repeat, load_repeat):
+    """Run the benchmarks for one catalog in a fresh interpreter"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        result_file = f.name
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--run', path, '--result-file', result_file,
+                        '--repeat', str(repeat), '--load-repeat', str(load_repeat)], check=True)
+        with open(result_file) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_file)
+
+
+def compare(report, baseline, threshold=0.1):
+    """Print p50 changes against a baseline report; returns the regressed metrics"""
+    regressions = []
+    for size, results in report['sizes'].items():
+        for metric, value in results.items():
+            old = baseline.get('sizes', {}).get(size, {}).get(metric)
+            if not isinstance(value, dict) or not isinstance(old, dict) or 'p50' not in value or not old.get('p50'):
+                continue
+            ratio = value['p50'] / old['p50']
+            flag = 'REGRESSION' if ratio > 1 + threshold else ''
+            print(f"{size:>10} {metric:<32} {old['p50']:>10.3f} -> {value['p50']:>10.3f} ms  {ratio:5.2f}x {flag}")
+            if flag:
+                regressions.append((size, metric, ratio))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's load, filter, aggregate and render paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="catalog sizes in songs")
+    parser.add_argument('--data-dir', default='benchmark_data', help="where generated catalogs are kept")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON report file")
+    parser.add_argument('--repeat', type=int, default=20, help="samples per measurement")
+    parser.add_argument('--load-repeat', type=int, default=3, help="samples of load_data()")
+    parser.add_argument('--workers', type=int, default=None, help="processes for catalog generation")
+    parser.add_argument('--compare', default=None, help="baseline report to compare p50 latencies against")
+    parser.add_argument('--threshold', type=float, default=0.1, help="p50 slowdown flagged as a regression")
+    parser.add_argument('--run', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.run:
+        with open(args.result_file, 'w') as f:
+            json.dump(run(args.run, args.repeat, args.load_repeat), f)
+        sys.exit(0)
+
+    report = {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': SEED,
+        'repeat': args.repeat,
+        'sizes': {}
+    }
+    for size in args.sizes:
+        path = ensure_catalog(args.data_dir, size, args.workers)
+        print(f"Benchmarking {size:,} songs...")
+        results = run_size(path, args.repeat, args.load_repeat)
+        report['sizes'][str(size)] = results
+        print(f"{size:>10,} songs: load {results['load_data']['p50']:.0f} ms, "
+              f"apply (combined, cold) {results['callback/apply/combined/cold']['p50']:.2f} ms, "
+              f"peak {results['peak_rss_mb']} MB")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved as '{args.output}'")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
@@ -0,0 +1,516 @@
+import numpy as np
+import pandas as pd
+
+
+class Aggregate:
+    """Additive aggregates of a set of tracks: count, column sums, mood and genre tag counts"""
+
+    def __init__(self, count, sums, mood_counts, genre_counts):
+        self.count = int(count)
+        self.sums = sums
+        self.mood_counts = mood_counts
+        self.genre_counts = genre_counts
+
+    def mean(self, column):
+        return float(self.sums[column]) / self.count if self.count else float('nan')
+
+    @property
+    def top_genre(self):
+        return self.genre_counts.index[0] if self.count else "N/A"
+
+    def to_dict(self):
+        """JSON-safe form, e.g. for a dcc.Store"""
+        return {
+            'count': self.count,
+            'sums': {c: float(v) for c, v in self.sums.items()},
+            'mood_counts': {m: int(n) for m, n in self.mood_counts.items()},
+            'genre_counts': {g: int(n) for g, n in self.genre_counts.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        genre_counts = pd.Series(data['genre_counts'], dtype=np.int64)
+        return cls(
+            data['count'], data['sums'],
+            pd.Series(data['mood_counts'], dtype=np.int64),
+            genre_counts.sort_values(ascending=False, kind='stable')
+        )
+
+
+# ========== DATA CUBE ==========
+class CatalogCube:
+    """Pre-aggregated cells keyed by artist x artist_genres value x release month.
+
+    Each cell holds a track count, sums of the KPI/feature columns and mood
+    counts. Cells are keyed by the whole artist_genres value rather than by
+    single genres so a track is never counted twice; genre tag counts are
+    derived from the values when queried. A filter is answered by summing
+    the matching cells for whole months, plus a scan of the rows released in
+    the partial months at either end of the date range.
+    """
+
+    SUM_COLUMNS = ['popularity', 'duration_min', 'explicit', 'energy',
+                   'danceability', 'speechiness', 'acousticness', 'valence']
+
+    # Cell key bit layout: artist code | artist_genres code (24 bits) | month (16 bits)
+    COMBO_BITS = 24
+    MONTH_BITS = 16
+    MONTH_OFFSET = 1 << (MONTH_BITS - 1)  # months before 1970 stay positive
+
+    def __init__(self, df, filter_engine, sum_columns=None):
+        self.genre_index = filter_engine.genre_index
+        self.sum_columns = [c for c in (sum_columns or self.SUM_COLUMNS) if c in df.columns]
+
+        artists = df['artist'].astype('category')
+        moods = df['mood'].astype('category')
+        self.artists = list(artists.cat.categories)
+        self.moods = list(moods.cat.categories)
+        self.artist_codes = artists.cat.codes.to_numpy()
+        self.mood_codes = moods.cat.codes.to_numpy()
+        self.refresh(df, filter_engine)
+
+        keys, inverse = self._cell_keys(self.artist_codes, self.combo_codes, df['release_date'])
+        self.cell_keys = keys
+        self.cell_count, self.cell_sums, self.cell_moods = self._aggregate(
+            inverse, len(keys), self.mood_codes, self.columns
+        )
+        self._decode()
+
+    def __len__(self):
+        return len(self.cell_keys)
+
+    def __getstate__(self):
+        # The row-level columns are views of the catalog: pickling them would
+        # copy them, so an unpickled cube needs refresh() with the catalog
+        state = self.__dict__.copy()
+        state['columns'] = None
+        return state
+
+    def refresh(self, df, filter_engine):
+        """Point the row-level arrays used for partial months at the current catalog"""
+        self.combo_codes = self.genre_index.codes
+        self.columns = {c: df[c].to_numpy() for c in self.sum_columns}  # no copies
+        self.date_order = filter_engine.date_order
+        self.sorted_dates = filter_engine.sorted_dates
+
+    def _cell_keys(self, artist_codes, combo_codes, release_dates):
+        """Sorted distinct cell keys of some rows, and each row's index into them"""
+        months = release_dates.to_numpy().astype('datetime64[M]').astype(np.int64) + self.MONTH_OFFSET
+        keys = (artist_codes.astype(np.int64) << (self.COMBO_BITS + self.MONTH_BITS)) \
+            | (combo_codes.astype(np.int64) << self.MONTH_BITS) | months
+        return np.unique(keys, return_inverse=True)
+
+    def _aggregate(self, inverse, num_cells, mood_codes, columns):
+        count = np.bincount(inverse, minlength=num_cells)
+        sums = {
+            c: np.bincount(inverse, weights=v.astype(np.float64), minlength=num_cells) for c, v in columns.items()
+        }
+        moods = np.bincount(
+            inverse * len(self.moods) + mood_codes, minlength=num_cells * len(self.moods)
+        ).reshape(num_cells, len(self.moods))
+        return count, sums, moods
+
+    def _decode(self):
+        """Split the cell keys into artist, artist_genres and month arrays"""
+        self.cell_month = (self.cell_keys & ((1 << self.MONTH_BITS) - 1)) - self.MONTH_OFFSET
+        self.cell_combo = (self.cell_keys >> self.MONTH_BITS) & ((1 << self.COMBO_BITS) - 1)
+        self.cell_artist = self.cell_keys >> (self.COMBO_BITS + self.MONTH_BITS)
+        # Cells are sorted artist-first: an artist's cells are one slice
+        self.artist_bounds = np.searchsorted(self.cell_artist, np.arange(len(self.artists) + 1))
+
+    def _codes_for(self, values, categories):
+        """Codes of `values` in a growing category list (new values are appended)"""
+        known = set(categories)
+        categories.extend(v for v in pd.unique(values) if v not in known)
+        return pd.Categorical(values, categories=categories).codes
+
+    def append(self, batch, df, filter_engine):
+        """Add rows appended to `df` (already indexed by `filter_engine`) to the cells"""
+        artist_codes = self._codes_for(batch['artist'].astype(str), self.artists)
+        num_moods = len(self.moods)
+        mood_codes = self._codes_for(batch['mood'].astype(str), self.moods)
+        if len(self.moods) > num_moods:
+            self.cell_moods = np.pad(self.cell_moods, ((0, 0), (0, len(self.moods) - num_moods)))
+        self.artist_codes = np.concatenate([self.artist_codes, artist_codes])
+        self.mood_codes = np.concatenate([self.mood_codes, mood_codes])
+        self.refresh(df, filter_engine)
+
+        combo_codes = self.combo_codes[len(self.combo_codes) - len(batch):]
+        keys, inverse = self._cell_keys(artist_codes, combo_codes, batch['release_date'])
+        count, sums, moods = self._aggregate(
+            inverse, len(keys), mood_codes, {c: batch[c].to_numpy() for c in self.sum_columns}
+        )
+
+        # Add to existing cells, insert the new ones in key order
+        positions = np.searchsorted(self.cell_keys, keys)
+        existing = positions < len(self.cell_keys)
+        existing[existing] = self.cell_keys[positions[existing]] == keys[existing]
+        hit, new = positions[existing], positions[~existing]
+        self.cell_count[hit] += count[existing]
+        self.cell_moods[hit] += moods[existing]
+        for c in self.sum_columns:
+            self.cell_sums[c][hit] += sums[c][existing]
+        self.cell_keys = np.insert(self.cell_keys, new, keys[~existing])
+        self.cell_count = np.insert(self.cell_count, new, count[~existing])
+        self.cell_moods = np.insert(self.cell_moods, new, moods[~existing], axis=0)
+        for c in self.sum_columns:
+            self.cell_sums[c] = np.insert(self.cell_sums[c], new, sums[c][~existing])
+        self._decode()
+
+    def _code_mask(self, values, categories):
+        mask = np.zeros(len(categories), dtype=bool)
+        lookup = {v: i for i, v in enumerate(categories)}
+        mask[[lookup[v] for v in values if v in lookup]] = True
+        return mask
+
+    def _combo_mask(self, genres):
+        """Which artist_genres values contain any of `genres`"""
+        genres = set(genres)
+        return np.array([bool(genres.intersection(combo)) for combo in self.genre_index.combo_genres], dtype=bool)
+
+    def _month_range(self, start_date, end_date):
+        """Whole months inside [start_date, end_date] as a (first, after last) pair of month
+        numbers, or None if there is no whole month, and the partial date ranges around them"""
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+        first_full = start if start.day == 1 else start + pd.offsets.MonthBegin(1)
+        after_last_full = (end + pd.Timedelta(days=1)).to_period('M').to_timestamp()
+        if first_full >= after_last_full:
+            return None, [(start, end)]
+        months = (first_full.to_datetime64().astype('datetime64[M]').astype(np.int64),
+                  after_last_full.to_datetime64().astype('datetime64[M]').astype(np.int64))
+        edges = []
+        if start < first_full:
+            edges.append((start, first_full - pd.Timedelta(days=1)))
+        if after_last_full <= end:
+            edges.append((after_last_full, end))
+        return months, edges
+
+    def _rows_between(self, start, end):
+        lo = np.searchsorted(self.sorted_dates, start.to_datetime64().astype(self.sorted_dates.dtype), side='left')
+        hi = np.searchsorted(self.sorted_dates, end.to_datetime64().astype(self.sorted_dates.dtype), side='right')
+        return self.date_order[lo:hi]
+
+    def query(self, artists=None, genres=None, start_date=None, end_date=None):
+        """Aggregate of the tracks matching the dashboard filters"""
+        artist_mask = self._code_mask(artists, self.artists) if artists else None
+        combo_mask = self._combo_mask(genres) if genres else None
+        if start_date and end_date:
+            months, edges = self._month_range(start_date, end_date)
+        else:
+            months, edges = (None, None), []
+
+        # Whole months from the cube cells
+        if months is None:
+            cells = np.array([], dtype=np.int64)
+        elif artist_mask is not None:
+            cells = np.concatenate([np.arange(self.artist_bounds[a], self.artist_bounds[a + 1])
+                                    for a in np.flatnonzero(artist_mask)] or [np.array([], dtype=np.int64)])
+        else:
+            cells = np.arange(len(self))
+        if combo_mask is not None and len(cells):
+            cells = cells[combo_mask[self.cell_combo[cells]]]
+        if months is not None and months[0] is not None and len(cells):
+            month = self.cell_month[cells]
+            cells = cells[(month >= months[0]) & (month < months[1])]
+
+        count = self.cell_count[cells].sum()
+        sums = {c: v[cells].sum() for c, v in self.cell_sums.items()}
+        moods = self.cell_moods[cells].sum(axis=0)
+        combo_counts = np.bincount(self.cell_combo[cells], weights=self.cell_count[cells],
+                                   minlength=len(self.genre_index.combo_genres)).astype(np.int64)
+
+        # Partial months at the ends of the range from the rows themselves
+        for start, end in edges:
+            rows = self._rows_between(start, end)
+            if artist_mask is not None:
+                rows = rows[artist_mask[self.artist_codes[rows]]]
+            if combo_mask is not None:
+                rows = rows[combo_mask[self.combo_codes[rows]]]
+            count += len(rows)
+            for c, v in self.columns.items():
+                sums[c] += v[rows].sum(dtype=np.float64)
+            moods = moods + np.bincount(self.mood_codes[rows], minlength=len(self.moods))
+            combo_counts = combo_counts + np.bincount(self.combo_codes[rows], minlength=len(combo_counts))
+
+        return Aggregate(
+            count, sums,
+            pd.Series(moods, index=self.moods, dtype=np.int64),
+            self.genre_index.combo_tag_counts(combo_counts)
+        )
+
+
+# ========== TREND ROLLUPS ==========
+GRANULARITIES = ['day', 'week', 'month']
+
+
+def period_numbers(days, granularity):
+    """Period of each day number (days since 1970-01-01); weeks start on Monday"""
+    days = np.asarray(days, dtype=np.int64)
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        return (days + 3) // 7  # 1970-01-01 was a Thursday
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def period_starts(periods, granularity):
+    """Day number of the first day of each period"""
+    periods = np.asarray(periods, dtype=np.int64)
+    if granularity == 'day':
+        return periods
+    if granularity == 'week':
+        return periods * 7 - 3
+    return periods.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+
+
+def day_number(date):
+    return int(pd.Timestamp(date).normalize().to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+class Rollup:
+    """Cells of one granularity, sorted by group then period: a track count and column sums each"""
+
+    def __init__(self, keys, count, sums, num_groups):
+        self.count = count
+        self.sums = sums
+        self.period = ((keys & ((1 << TrendCube.PERIOD_BITS) - 1)) - TrendCube.PERIOD_OFFSET).astype(np.int32)
+        self.group = (keys >> TrendCube.PERIOD_BITS).astype(np.int32)
+        # Cells are sorted group-first: a group's cells are one slice
+        self.group_bounds = np.searchsorted(self.group, np.arange(num_groups + 1))
+
+    def __len__(self):
+        return len(self.count)
+
+
+class TrendCube:
+    """Rollups of track counts and column sums per day, week and month.
+
+    There is one set of rollups per grouping: all tracks, by artist, by
+    artist_genres value and by single genre. Day cells are aggregated from
+    the rows once, week and month cells from the day cells. A trend query
+    sums the cells of the requested granularity for the periods wholly
+    inside the date range and the day cells of the partial periods at either
+    end, so it never scans rows.
+
+    A genre filter uses the single-genre cells unless a track can carry two
+    of the chosen genres (it would be counted twice); then it uses the
+    artist_genres cells. Only a filter on both artists and genres is
+    answered from its rows: artist x artist_genres cells would be about as
+    many as the rows. Artist and artist_genres codes are shared with the
+    CatalogCube.
+    """
+
+    TREND_COLUMNS = ['popularity', 'danceability', 'energy', 'speechiness', 'acousticness', 'valence']
+    GROUPINGS = ['all', 'artist', 'combo']  # aggregated from rows; 'genre' from the 'combo' day cells
+
+    # Cell key bit layout: group code | period (20 bits)
+    PERIOD_BITS = 20
+    PERIOD_OFFSET = 1 << (PERIOD_BITS - 1)  # days before 1970 stay positive
+
+    def __init__(self, df, cube, filter_engine, columns=None):
+        self.cube = cube
+        self.sum_columns = [c for c in (columns or self.TREND_COLUMNS) if c in df.columns]
+        self.refresh(df, filter_engine)
+        self.genres, self.genre_codes = [], {}
+        self.rollups = self._rollups(cube.artist_codes, cube.combo_codes, df)
+
+    def __getstate__(self):
+        # Like CatalogCube: the row-level columns are views of the catalog
+        state = self.__dict__.copy()
+        state['columns'] = state['release_dates'] = None
+        return state
+
+    def refresh(self, df, filter_engine):
+        """Point the row-level arrays used for artist and genre filters at the current catalog"""
+        self.filter_engine = filter_engine
+        self.columns = {c: df[c].to_numpy() for c in self.sum_columns}  # no copies
+        self.release_dates = df['release_date'].to_numpy()
+
+    def _num_groups(self, grouping):
+        if grouping == 'artist':
+            return len(self.cube.artists)
+        if grouping == 'combo':
+            return len(self.cube.genre_index.combo_genres)
+        if grouping == 'genre':
+            return len(self.genres)
+        return 1
+
+    def _group_codes(self, grouping, artist_codes, combo_codes):
+        if grouping == 'artist':
+            return artist_codes
+        if grouping == 'combo':
+            return combo_codes
+        return np.zeros(len(artist_codes), dtype=np.int64)
+
+    def _rollups(self, artist_codes, combo_codes, rows):
+        """{grouping: {granularity: Rollup}} of some rows (rows without a release date are left out)"""
+        dates = rows['release_date'].to_numpy().astype('datetime64[D]')
+        dated = ~np.isnat(dates)
+        day_numbers = dates[dated].astype(np.int64)
+        sums = {c: rows[c].to_numpy()[dated] for c in self.sum_columns}
+        days = {
+            grouping: self._rollup(
+                self._group_codes(grouping, artist_codes[dated], combo_codes[dated]), day_numbers,
+                np.ones(len(day_numbers), dtype=np.int64), sums, self._num_groups(grouping)
+            )
+            for grouping in self.GROUPINGS
+        }
+        days['genre'] = self._genre_rollup(days['combo'])
+        rollups = {}
+        for grouping, day in days.items():
+            rollups[grouping] = {'day': day}
+            for granularity in GRANULARITIES[1:]:
+                rollups[grouping][granularity] = self._rollup(
+                    day.group, period_numbers(day.period, granularity), day.count, day.sums,
+                    self._num_groups(grouping)
+                )
+        return rollups
+
+    def _combo_genre_codes(self):
+        """Genre codes of every artist_genres value, flattened, with each value's start and length"""
+        combos = [list(dict.fromkeys(combo)) for combo in self.cube.genre_index.combo_genres]  # "Pop, Pop" is one genre
+        for combo in combos:
+            for genre in combo:
+                if genre not in self.genre_codes:  # codes stay stable as genres are added
+                    self.genre_codes[genre] = len(self.genres)
+                    self.genres.append(genre)
+        lengths = np.array([len(combo) for combo in combos], dtype=np.int64)
+        codes = np.array([self.genre_codes[g] for combo in combos for g in combo], dtype=np.int64)
+        return codes, np.cumsum(lengths) - lengths, lengths
+
+    def _genre_rollup(self, combos):
+        """Rollup by single genre from a rollup by artist_genres value: a cell counts once per genre"""
+        codes, starts, lengths = self._combo_genre_codes()
+        cells = np.flatnonzero(combos.group >= 0)  # -1: no artist_genres
+        repeats = lengths[combos.group[cells]]
+        expanded = np.repeat(cells, repeats)
+        offsets = np.arange(len(expanded)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        genres = codes[np.repeat(starts[combos.group[cells]], repeats) + offsets]
+        return self._rollup(
+            genres, combos.period[expanded], combos.count[expanded],
+            {c: v[expanded] for c, v in combos.sums.items()}, len(self.genres)
+        )
+
+    def _genre_mask(self, genres):
+        """Mask over the single-genre groups, or None if a track can carry two of `genres`"""
+        genres = set(genres)
+        if any(len(genres.intersection(combo)) > 1 for combo in self.cube.genre_index.combo_genres):
+            return None
+        mask = np.zeros(len(self.genres), dtype=bool)
+        mask[[self.genre_codes[g] for g in genres if g in self.genre_codes]] = True
+        return mask
+
+    def _rollup(self, groups, periods, count, sums, num_groups):
+        """Cells summing `count` and `sums` by group and period"""
+        keys = (groups.astype(np.int64) << self.PERIOD_BITS) | (periods.astype(np.int64) + self.PERIOD_OFFSET)
+        keys, inverse = np.unique(keys, return_inverse=True)
+        return Rollup(
+            keys,
+            np.bincount(inverse, weights=count, minlength=len(keys)).astype(np.int64),
+            {c: np.bincount(inverse, weights=v.astype(np.float64), minlength=len(keys)) for c, v in sums.items()},
+            num_groups
+        )
+
+    def append(self, batch, df, filter_engine):
+        """Add rows appended to `df` (after CatalogCube.append) to every rollup"""
+        self.refresh(df, filter_engine)
+        if not len(batch):
+            return
+        added = self._rollups(self.cube.artist_codes[-len(batch):], self.cube.combo_codes[-len(batch):], batch)
+        for grouping, levels in added.items():
+            num_groups = self._num_groups(grouping)
+            for granularity, new in levels.items():
+                old = self.rollups[grouping][granularity]
+                self.rollups[grouping][granularity] = self._rollup(
+                    np.concatenate([old.group, new.group]), np.concatenate([old.period, new.period]),
+                    np.concatenate([old.count, new.count]),
+                    {c: np.concatenate([old.sums[c], new.sums[c]]) for c in self.sum_columns},
+                    num_groups
+                )
+
+    def _cells(self, rollup, group_mask, first=None, last=None):
+        """Cells of `rollup` in the groups set in `group_mask` (all if None), with a period in [first, last] if given"""
+        if group_mask is not None:
+            cells = np.concatenate([np.arange(rollup.group_bounds[g], rollup.group_bounds[g + 1])
+                                    for g in np.flatnonzero(group_mask)] or [np.array([], dtype=np.int64)])
+        else:
+            cells = np.arange(len(rollup))
+        if first is not None and len(cells):
+            period = rollup.period[cells]
+            cells = cells[(period >= first) & (period <= last)]
+        return cells
+
+    def _from_cells(self, levels, group_mask, start_date, end_date, granularity):
+        """(periods, counts, {column: sums}) of the matching cells, whole periods from the requested
+        granularity and partial ones from day cells"""
+        level, day = levels[granularity], levels['day']
+        if start_date and end_date:
+            start, end = day_number(start_date), day_number(end_date)
+            first, last = period_numbers([start, end], granularity)
+            if period_starts(first, granularity) < start:
+                first += 1
+            if period_starts(last + 1, granularity) - 1 > end:
+                last -= 1
+            parts = []
+            if first <= last:
+                parts.append((level, self._cells(level, group_mask, first, last)))
+                edges = [(start, period_starts(first, granularity) - 1), (period_starts(last + 1, granularity), end)]
+            else:
+                edges = [(start, end)]
+            parts.extend((day, self._cells(day, group_mask, lo, hi)) for lo, hi in edges if lo <= hi)
+        else:
+            parts = [(level, self._cells(level, group_mask))]
+        periods = np.concatenate([
+            part.period[cells] if part is level else period_numbers(part.period[cells], granularity)
+            for part, cells in parts
+        ])
+        counts = np.concatenate([part.count[cells] for part, cells in parts])
+        sums = {c: np.concatenate([part.sums[c][cells] for part, cells in parts]) for c in self.sum_columns}
+        return periods, counts, sums
+
+    def _from_rows(self, artists, genres, start_date, end_date, granularity):
+        """(periods, counts, {column: sums}) of the matching rows, one per row"""
+        rows = self.filter_engine.select(artists, genres, start_date, end_date)
+        dates = self.release_dates[rows].astype('datetime64[D]')
+        rows, dates = rows[~np.isnat(dates)], dates[~np.isnat(dates)]
+        periods = period_numbers(dates.astype(np.int64), granularity)
+        return periods, np.ones(len(rows), dtype=np.int64), {c: v[rows] for c, v in self.columns.items()}
+
+    def query(self, artists=None, genres=None, start_date=None, end_date=None, granularity='month'):
+        """Track count and column means per period of the tracks matching the dashboard filters.
+
+        A DataFrame indexed by the first day of each period, from the first
+        to the last period with a matching track; empty periods have a count
+        of 0 and NaN means.
+        """
+        if artists and genres:
+            periods, counts, sums = self._from_rows(artists, genres, start_date, end_date, granularity)
+        elif artists:
+            periods, counts, sums = self._from_cells(
+                self.rollups['artist'], self.cube._code_mask(artists, self.cube.artists),
+                start_date, end_date, granularity
+            )
+        elif genres:
+            genre_mask = self._genre_mask(genres)
+            if genre_mask is not None:
+                rollups, group_mask = self.rollups['genre'], genre_mask
+            else:
+                rollups, group_mask = self.rollups['combo'], self.cube._combo_mask(genres)
+            periods, counts, sums = self._from_cells(rollups, group_mask, start_date, end_date, granularity)
+        else:
+            periods, counts, sums = self._from_cells(self.rollups['all'], None, start_date, end_date, granularity)
+
+        if not len(periods):
+            return pd.DataFrame(columns=['count'] + self.sum_columns, index=pd.DatetimeIndex([], name='period'))
+        offset = periods.min()
+        buckets, size = periods - offset, periods.max() - offset + 1
+        count = np.bincount(buckets, weights=counts, minlength=size)
+        trend = pd.DataFrame({'count': count.astype(np.int64)}, index=pd.DatetimeIndex(
+            period_starts(np.arange(size) + offset, granularity).astype('datetime64[D]'), name='period'
+        ))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for c in self.sum_columns:
+                total = np.bincount(buckets, weights=sums[c].astype(np.float64), minlength=size)
+                trend[c] = np.where(count > 0, total / count, np.nan)
+        return trend
@@ -0,0 +1,305 @@
+import numpy as np
+import pandas as pd
+
+
+def split_genres(artist_genres):
+    """Split an `artist_genres` value ("Bollywood, Romantic") into its genres"""
+    return [g.strip() for g in str(artist_genres).split(',') if g.strip()]
+
+
+def group_rows(codes, num_groups):
+    """Row ids grouped by code: returns (order, bounds) so that group k is order[bounds[k]:bounds[k + 1]]"""
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=num_groups)
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    return order[len(codes) - bounds[-1]:], bounds  # missing values (-1) sort first
+
+
+# ========== BITMAPS ==========
+# Row sets are packed bitmaps (np.packbits, 1 bit per row): a full-catalog
+# AND/OR is a few hundred KB of vectorized bytes even at millions of rows.
+BIT_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+
+def rows_to_bitmap(rows, size):
+    mask = np.zeros(size, dtype=bool)
+    mask[rows] = True
+    return np.packbits(mask)
+
+
+def bitmap_to_rows(bitmap, size):
+    return np.flatnonzero(np.unpackbits(bitmap, count=size))
+
+
+def sparse_bitmap_to_rows(bitmap, size):
+    """Same as bitmap_to_rows, but only unpacks the non-zero bytes: faster when few rows are set"""
+    nonzero = np.flatnonzero(bitmap)
+    bits = np.unpackbits(bitmap[nonzero]).reshape(-1, 8).view(bool)
+    rows = (nonzero[:, None] * 8 + np.arange(8))[bits]
+    return rows[rows < size]
+
+
+def bitmap_count(bitmap):
+    """Number of rows set in `bitmap`"""
+    if hasattr(np, 'bitwise_count'):  # NumPy 2
+        return int(np.bitwise_count(bitmap).sum())
+    return int(BIT_COUNTS[bitmap].sum())
+
+
+def set_bits(bitmap, rows):
+    np.bitwise_or.at(bitmap, rows >> 3, (0x80 >> (rows & 7)).astype(np.uint8))
+
+
+def bitmap_contains(bitmap, rows):
+    """Whether each of `rows` is set in `bitmap`"""
+    return (bitmap[rows >> 3] >> (7 - (rows & 7))) & 1 == 1
+
+
+def top_k(order, bitmap, k, block=None):
+    """First `k` rows of `order` that are set in `bitmap` (all rows if `bitmap` is None).
+
+    Walks `order` in growing blocks, so the cost is about k / selectivity
+    rows rather than the whole catalog.
+    """
+    if bitmap is None:
+        return order[:k]
+    found = []
+    count = 0
+    start, block = 0, block or max(64, 4 * k)
+    while count < k and start < len(order):
+        rows = order[start:start + block]
+        hits = rows[bitmap_contains(bitmap, rows)]
+        found.append(hits[:k - count])
+        count += len(found[-1])
+        start += block
+        block *= 2
+    return np.concatenate(found) if found else order[:0]
+
+
+def grow_bitmap(bitmap, nbytes):
+    """Bitmap with room for at least `nbytes`, doubling the capacity so appends are amortized"""
+    if len(bitmap) >= nbytes:
+        return bitmap
+    grown = np.zeros(max(nbytes, 2 * len(bitmap)), dtype=np.uint8)
+    grown[:len(bitmap)] = bitmap
+    return grown
+
+
+# ========== GENRE INDEX ==========
+class GenreIndex:
+    """Inverted index from each genre to the sorted row ids tagged with it.
+
+    `artist_genres` only has a few hundred distinct values, so every distinct
+    value is split once and its rows are shared by all of its genres. Genres
+    match exactly: "Rock" does not match "Pop Rock".
+    """
+
+    def __init__(self, artist_genres):
+        values = artist_genres.astype('category')
+        self.codes = values.cat.codes.to_numpy()
+        self.combo_values = list(values.cat.categories)
+        self.combo_genres = [split_genres(value) for value in self.combo_values]
+        order, bounds = group_rows(self.codes, len(self.combo_genres))
+
+        combos_by_genre = {}
+        for code, combo in enumerate(self.combo_genres):
+            for genre in combo:
+                combos_by_genre.setdefault(genre, []).append(order[bounds[code]:bounds[code + 1]])
+        self.rows = {
+            genre: np.unique(np.concatenate(parts)) for genre, parts in combos_by_genre.items()
+        }
+        self.size = len(self.codes)
+
+    @property
+    def genres(self):
+        return sorted(self.rows)
+
+    def append(self, artist_genres):
+        """Index rows appended after the current ones; returns their codes"""
+        known = set(self.combo_values)
+        for value in pd.unique(artist_genres.dropna().astype(str)):
+            if value not in known:
+                self.combo_values.append(value)
+                self.combo_genres.append(split_genres(value))
+        codes = pd.Categorical(artist_genres.astype(str), categories=self.combo_values).codes
+        order, bounds = group_rows(codes, len(self.combo_values))
+        order = order + self.size
+
+        combos_by_genre = {}
+        for code in np.flatnonzero(np.diff(bounds)):
+            for genre in self.combo_genres[code]:
+                combos_by_genre.setdefault(genre, []).append(order[bounds[code]:bounds[code + 1]])
+        # New row ids are larger than every existing one, so the arrays stay sorted
+        for genre, parts in combos_by_genre.items():
+            new_rows = np.unique(np.concatenate(parts))
+            self.rows[genre] = np.concatenate([self.rows[genre], new_rows]) if genre in self.rows else new_rows
+        self.codes = np.concatenate([self.codes, codes])
+        self.size = len(self.codes)
+        return codes
+
+    def rows_for(self, genres):
+        """Sorted row ids tagged with any of `genres`"""
+        parts = [self.rows[g] for g in genres if g in self.rows]
+        if not parts:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def mask(self, genres):
+        """Boolean mask over all rows tagged with any of `genres`"""
+        mask = np.zeros(self.size, dtype=bool)
+        for genre in genres:
+            if genre in self.rows:
+                mask[self.rows[genre]] = True
+        return mask
+
+    def tag_counts(self, rows=None):
+        """Genre tag occurrences over `rows` (all rows by default), most common first"""
+        codes = self.codes if rows is None else self.codes[rows]
+        return self.combo_tag_counts(np.bincount(codes[codes >= 0], minlength=len(self.combo_genres)))
+
+    def combo_tag_counts(self, combo_counts):
+        """Genre tag occurrences given a count per artist_genres value, most common first"""
+        counts = {}
+        for combo, count in zip(self.combo_genres, combo_counts):
+            for genre in combo:
+                counts[genre] = counts.get(genre, 0) + int(count)
+        return pd.Series(counts, dtype=np.int64).sort_values(ascending=False, kind='stable')
+
+
+# ========== RANK INDEX ==========
+class RankIndex:
+    """Row ids sorted by one column, largest first, for top-K queries under any filter.
+
+    Ties keep row order, like `nlargest(keep='first')`. Missing values rank last.
+    """
+
+    def __init__(self, values):
+        keys = self._keys(values)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def _keys(self, values):
+        keys = -np.asarray(values, dtype=np.float64)
+        keys[np.isnan(keys)] = np.inf
+        return keys
+
+    def append(self, values, first_row_id):
+        """Merge rows appended after the current ones into the order"""
+        keys = self._keys(values)
+        order = np.argsort(keys, kind='stable')
+        # side='right': new rows go after existing rows with the same value
+        positions = np.searchsorted(self.keys, keys[order], side='right')
+        self.keys = np.insert(self.keys, positions, keys[order])
+        self.order = np.insert(self.order, positions, order + first_row_id)
+
+    def top(self, k, bitmap=None):
+        """Row ids of the `k` largest values among the rows set in `bitmap`"""
+        return top_k(self.order, bitmap, k)
+
+
+# ========== FILTER ENGINE ==========
+class FilterEngine:
+    """Precomputed indexes for the dashboard filters.
+
+    Holds a bitmap per artist and per genre plus the row ids sorted by
+    release date, so a date range is two binary searches. `select()` ANDs
+    the active filters into one sorted row-id array without copying the
+    catalog.
+    """
+
+    def __init__(self, df, genre_index=None):
+        self.size = len(df)
+        artists = df['artist'].astype('category')
+        order, bounds = group_rows(artists.cat.codes.to_numpy(), len(artists.cat.categories))
+        self.artist_bitmaps = {
+            artist: rows_to_bitmap(order[bounds[k]:bounds[k + 1]], self.size)
+            for k, artist in enumerate(artists.cat.categories)
+        }
+        self.genre_index = genre_index or GenreIndex(df['artist_genres'])
+        self.genre_bitmaps = {
+            genre: rows_to_bitmap(rows, self.size) for genre, rows in self.genre_index.rows.items()
+        }
+        dates = df['release_date'].to_numpy()
+        self.date_order = np.argsort(dates, kind='stable')
+        self.sorted_dates = dates[self.date_order]
+
+    @property
+    def nbytes(self):
+        """Bytes of a bitmap over the current rows (stored bitmaps may have spare capacity)"""
+        return (self.size + 7) // 8
+
+    @property
+    def artists(self):
+        return sorted(self.artist_bitmaps)
+
+    def append(self, batch):
+        """Index rows appended after the current ones, without rebuilding anything"""
+        offset = self.size
+        self.size += len(batch)
+        rows = np.arange(offset, self.size)
+
+        artists = batch['artist'].astype(str).astype('category')
+        order, bounds = group_rows(artists.cat.codes.to_numpy(), len(artists.cat.categories))
+        for k, artist in enumerate(artists.cat.categories):
+            bitmap = grow_bitmap(self.artist_bitmaps.get(artist, np.zeros(0, dtype=np.uint8)), self.nbytes)
+            set_bits(bitmap, rows[order[bounds[k]:bounds[k + 1]]])
+            self.artist_bitmaps[artist] = bitmap
+
+        codes = self.genre_index.append(batch['artist_genres'])
+        order, bounds = group_rows(codes, len(self.genre_index.combo_genres))
+        for code in np.flatnonzero(np.diff(bounds)):
+            for genre in self.genre_index.combo_genres[code]:
+                bitmap = grow_bitmap(self.genre_bitmaps.get(genre, np.zeros(0, dtype=np.uint8)), self.nbytes)
+                set_bits(bitmap, rows[order[bounds[code]:bounds[code + 1]]])
+                self.genre_bitmaps[genre] = bitmap
+
+        # Merge the new dates into the sorted order: no re-sort of the old rows
+        dates = batch['release_date'].to_numpy().astype(self.sorted_dates.dtype)
+        date_order = np.argsort(dates, kind='stable')
+        positions = np.searchsorted(self.sorted_dates, dates[date_order], side='right')
+        self.sorted_dates = np.insert(self.sorted_dates, positions, dates[date_order])
+        self.date_order = np.insert(self.date_order, positions, rows[date_order])
+
+    def date_bitmap(self, start_date, end_date):
+        """Bitmap of rows released in [start_date, end_date], or None if that covers every row"""
+        start = pd.Timestamp(start_date).to_datetime64().astype(self.sorted_dates.dtype)
+        end = pd.Timestamp(end_date).to_datetime64().astype(self.sorted_dates.dtype)
+        lo = np.searchsorted(self.sorted_dates, start, side='left')
+        hi = np.searchsorted(self.sorted_dates, end, side='right')
+        if lo == 0 and hi == self.size:
+            return None
+        return rows_to_bitmap(self.date_order[lo:hi], self.size)
+
+    def _union(self, bitmaps, keys):
+        """Union of the stored bitmaps of `keys` over the current rows.
+
+        append() only grows the bitmaps of artists and genres in the batch,
+        so the others are shorter: their missing bytes are zeros.
+        """
+        union = np.zeros(self.nbytes, dtype=np.uint8)
+        for key in keys:
+            if key in bitmaps:
+                stored = bitmaps[key][:self.nbytes]
+                union[:len(stored)] |= stored
+        return union
+
+    def select_bitmap(self, artists=None, genres=None, start_date=None, end_date=None):
+        """Combined bitmap of all active filters, or None when nothing is filtered out"""
+        bitmap = None
+        if artists:
+            bitmap = self._union(self.artist_bitmaps, artists)
+        if genres:
+            genre_bitmap = self._union(self.genre_bitmaps, genres)
+            bitmap = genre_bitmap if bitmap is None else bitmap & genre_bitmap
+        if start_date and end_date:
+            date_bitmap = self.date_bitmap(start_date, end_date)
+            if date_bitmap is not None:
+                bitmap = date_bitmap if bitmap is None else bitmap & date_bitmap
+        return bitmap
+
+    def select(self, artists=None, genres=None, start_date=None, end_date=None):
+        """Sorted row ids matching all active filters"""
+        bitmap = self.select_bitmap(artists, genres, start_date, end_date)
+        if bitmap is None:
+            return np.arange(self.size)
+        return bitmap_to_rows(bitmap, self.size)
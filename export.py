@@ -0,0 +1,104 @@
+import io
+
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for Parquet exports
+    pa = pq = None
+
+from catalog_index import bitmap_to_rows
+
+# Streaming exports of catalog rows. The matching rows are found one block of
+# the catalog at a time, read one chunk at a time and serialized as they go,
+# so memory stays flat however many rows match: a response never holds more
+# than one chunk of rows and its encoded bytes.
+
+EXPORT_CHUNK_ROWS = 50000
+BLOCK_ROWS = 1 << 20  # catalog rows unpacked from the bitmap at a time (a multiple of 8)
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+
+def row_chunks(bitmap, size, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Ascending row ids below `size` set in `bitmap` (all rows if None), about `chunk_rows` at a time.
+
+    Always yields at least one chunk, so an export that matches nothing
+    still gets its CSV header or Parquet schema.
+    """
+    pending, count, yielded = [np.array([], dtype=np.int64)], 0, False
+    for start in range(0, size, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, size)
+        if bitmap is None:
+            rows = np.arange(start, stop)
+        else:
+            rows = bitmap_to_rows(bitmap[start // 8:(stop + 7) // 8], stop - start) + start
+        pending.append(rows)
+        count += len(rows)
+        while count >= chunk_rows:
+            rows = np.concatenate(pending)
+            yield rows[:chunk_rows]
+            pending, count, yielded = [rows[chunk_rows:]], count - chunk_rows, True
+    if count or not yielded:
+        yield np.concatenate(pending)
+
+
+def csv_chunks(frames):
+    """UTF-8 CSV of a sequence of DataFrames with the same columns, one bytes chunk per frame"""
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that keeps what was written until drain() takes it"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def arrow_table(frame):
+    """Arrow table of a DataFrame chunk; categoricals become plain columns (Parquet
+    dictionary-encodes them per row group anyway, without every category)"""
+    frame = frame.reset_index(drop=True)
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype(frame[column].cat.categories.dtype)
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def parquet_chunks(frames):
+    """Parquet file of a sequence of DataFrames with the same columns, one row group per frame"""
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow")
+    sink, writer = ChunkSink(), None
+    for frame in frames:
+        table = arrow_table(frame)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table.cast(writer.schema))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
@@ -0,0 +1,78 @@
+import base64
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+# Minimal Plotly figure dicts for the dashboard panels. Figures are built
+# from already-aggregated values, carry no template object (the theme is
+# applied in the browser, by name) and only set the attributes that differ
+# from the plotly.js defaults.
+
+TRANSPARENT = 'rgba(0,0,0,0)'
+
+# Numeric arrays at least this long are sent as base64 typed arrays; for a
+# handful of values the plain JSON list is shorter than the encoding
+TYPED_ARRAY_MIN = 16
+TYPED_ARRAY_DTYPES = {'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2',
+                      'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8'}
+
+
+def typed_array(values):
+    """Numeric values as a plotly.js typed array ({dtype, bdata}), or a plain list when short"""
+    values = np.asarray(values)
+    if len(values) < TYPED_ARRAY_MIN:
+        return values.tolist()
+    if values.dtype.name not in TYPED_ARRAY_DTYPES:
+        values = values.astype(np.float64)
+    return {
+        'dtype': TYPED_ARRAY_DTYPES[values.dtype.name],
+        'bdata': base64.b64encode(np.ascontiguousarray(values).tobytes()).decode('ascii')
+    }
+
+
+def payload_bytes(value):
+    """Size of `value` serialized the way Dash sends it to the browser"""
+    return len(to_json_plotly(value).encode('utf-8'))
+
+
+def figure(data, **layout):
+    return {
+        'data': data,
+        'layout': {'paper_bgcolor': TRANSPARENT, 'plot_bgcolor': TRANSPARENT, **layout}
+    }
+
+
+def grouped_bar(x, y, groups, hovertext=None, customdata=None, **layout):
+    """Bar chart with one trace (and legend entry) per distinct group, in order of appearance"""
+    groups = np.asarray(groups)
+    x, y = np.asarray(x), np.asarray(y)
+    traces = []
+    for group in dict.fromkeys(groups.tolist()):
+        rows = np.flatnonzero(groups == group)
+        trace = {'type': 'bar', 'name': group, 'x': x[rows].tolist(), 'y': typed_array(y[rows])}
+        if hovertext is not None:
+            trace['hovertext'] = [hovertext[i] for i in rows]
+        if customdata is not None:
+            trace['customdata'] = [customdata[i] for i in rows]
+        traces.append(trace)
+    return figure(traces, **layout)
+
+
+def polar_area(r, theta, color, **layout):
+    """Filled polar line over `theta` categories"""
+    trace = {'type': 'scatterpolar', 'r': typed_array(r), 'theta': list(theta),
+             'fill': 'toself', 'line': {'color': color}}
+    return figure([trace] if len(theta) else [], **layout)
+
+
+def donut(labels, values, hole=0.4, **layout):
+    """Pie chart of pre-aggregated values"""
+    return figure([{'type': 'pie', 'labels': list(labels), 'values': typed_array(values), 'hole': hole}], **layout)
+
+
+def time_series(x, series, bars=False, **layout):
+    """One trace per named series over the shared `x` (e.g. period start dates), as bars or lines"""
+    x = list(x)
+    # Lines run across empty periods (NaN means) instead of breaking up
+    kind = {'type': 'bar'} if bars else {'type': 'scatter', 'mode': 'lines', 'connectgaps': True}
+    return figure([{**kind, 'name': name, 'x': x, 'y': typed_array(y)} for name, y in series.items()], **layout)
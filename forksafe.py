@@ -0,0 +1,24 @@
+import os
+import threading
+import weakref
+
+# A process forked from a threaded server (e.g. a background job) inherits
+# every lock in the state another thread left it in, possibly held forever.
+# Objects that take their lock from fork_safe_lock() get a fresh one in the
+# child instead.
+
+_owners = weakref.WeakSet()
+
+
+def fork_safe_lock(owner):
+    """A new lock for `owner.lock`, replaced by a fresh one in forked children"""
+    _owners.add(owner)
+    return threading.Lock()
+
+
+def _reinit_locks():
+    for owner in _owners:
+        owner.lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reinit_locks)
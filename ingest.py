@@ -0,0 +1,47 @@
+import os
+import threading
+
+CATALOG_EXTENSIONS = ('.csv', '.parquet', '.feather', '.arrow')
+
+
+class DropDirectoryWatcher(threading.Thread):
+    """Polls a drop directory and hands every new catalog file to `on_file` once.
+
+    Files are picked up by name, so producers should write to a temporary
+    name (e.g. `batch.csv.tmp`) and rename when done. Files already in the
+    directory at startup are ingested too, which replays earlier batches
+    on top of the base catalog after a restart.
+    """
+
+    def __init__(self, path, on_file, interval=30):
+        super().__init__(name='catalog-ingest', daemon=True)
+        self.path = path
+        self.on_file = on_file
+        self.interval = interval
+        self.seen = set()
+        self.stopped = threading.Event()
+
+    def scan(self):
+        """Ingest the files that appeared since the last scan; returns how many"""
+        ingested = 0
+        for name in sorted(os.listdir(self.path)):
+            if name in self.seen or name.startswith('.') or not name.lower().endswith(CATALOG_EXTENSIONS):
+                continue
+            self.seen.add(name)
+            try:
+                self.on_file(os.path.join(self.path, name))
+                ingested += 1
+            except Exception as e:
+                print(f"Error ingesting {name}: {e}")
+        return ingested
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.scan()
+            except OSError as e:
+                print(f"Error scanning {self.path}: {e}")
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
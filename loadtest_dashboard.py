@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import requests
+
+from benchmark_dashboard import apply_body, callback_body, ensure_catalog, panel_bodies, summarize
+
+# Load test for a running dashboard: simulated analysts replay sessions
+# against /_dash-update-component the way the browser would. Artists and
+# genres are picked by typing into their dropdowns, which fetch matching
+# options from the server. Apply posts the filter stage and then every panel
+# callback; a feature change only posts the radar; theme toggles are
+# clientside callbacks and send no request.
+
+FEATURES = ['danceability', 'energy', 'speechiness', 'acousticness', 'valence']
+ACTIONS = {'apply': 0.6, 'features': 0.2, 'theme': 0.2}
+
+
+def layout_values(layout):
+    """Date bounds and catalog version from the served layout"""
+    found = {}
+
+    def walk(node):
+        if isinstance(node, dict):
+            props = node.get('props', {})
+            if props.get('id') == 'date-range':
+                found['dates'] = (props.get('min_date_allowed'), props.get('max_date_allowed'))
+            elif props.get('id') == 'catalog-version':
+                found['version'] = props.get('data')
+            for value in props.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(layout)
+    return found.get('dates', (None, None)), found.get('version')
+
+
+def random_filters(rng, pick, dates):
+    """A filter state like an analyst would pick: a few artists, a genre or two, maybe a date range.
+
+    `pick(kind, count)` chooses dropdown values (see Session.pick).
+    """
+    case = {}
+    if rng.random() < 0.7:
+        case['artists'] = pick('artist', rng.randint(1, 3))
+    if rng.random() < 0.5:
+        case['genres'] = pick('genre', rng.randint(1, 2))
+    first, last = dates
+    if first and last and rng.random() < 0.5:
+        first, last = date.fromisoformat(first[:10]), date.fromisoformat(last[:10])
+        span = (last - first).days
+        start = first + timedelta(days=rng.randint(0, max(span - 30, 0)))
+        case['start_date'] = start.isoformat()
+        case['end_date'] = min(last, start + timedelta(days=rng.randint(30, 3 * 365))).isoformat()
+    else:
+        case['start_date'], case['end_date'] = first, last
+    return case
+
+
+class Recorder:
+    """Latencies and errors per request type, shared by all simulated users"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, kind, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+            if not ok:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def report(self, elapsed):
+        requests_total = sum(len(v) for k, v in self.latencies.items() if not k.startswith('interaction/'))
+        errors_total = sum(n for k, n in self.errors.items() if not k.startswith('interaction/'))
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'requests': requests_total,
+            'errors': errors_total,
+            'error_rate': errors_total / requests_total if requests_total else 0.0,
+            'throughput_rps': round(requests_total / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {
+                kind: {**summarize(samples), 'errors': self.errors.get(kind, 0)}
+                for kind, samples in sorted(self.latencies.items())
+            }
+        }
+
+
+class Session:
+    """One simulated analyst with its own HTTP connection pool"""
+
+    def __init__(self, url, recorder, rng, timeout):
+        self.url = url.rstrip('/')
+        self.recorder = recorder
+        self.rng = rng
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.staged = None
+        self.version = None
+
+    def request(self, kind, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.url + path, timeout=self.timeout, **kwargs)
+            ok = response.status_code in (200, 204)
+            data = response.json() if response.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            ok, data = False, None
+        self.recorder.record(kind, time.perf_counter() - started, ok)
+        return data
+
+    def callback(self, kind, body):
+        data = self.request(kind, 'POST', '/_dash-update-component', json=body)
+        if data is None or 'cacheKey' not in data:
+            return data
+        # Background callbacks answer with job handles first: poll like the browser does
+        # until the result arrives (a 204 means the job ended without one)
+        path = f"/_dash-update-component?cacheKey={data['cacheKey']}&job={data['job']}"
+        deadline = time.perf_counter() + self.timeout
+        while data is not None and 'response' not in data:
+            if time.perf_counter() > deadline:
+                self.recorder.record(kind + '/timeout', self.timeout, False)
+                return None
+            time.sleep(0.1)
+            data = self.request(kind + '/poll', 'POST', path, json=body)
+        return data
+
+    def open_page(self):
+        layout = self.request('layout', 'GET', '/_dash-layout')
+        self.request('dependencies', 'GET', '/_dash-dependencies')
+        dates, self.version = layout_values(layout or {})
+        return dates
+
+    def pick(self, kind, count):
+        """Up to `count` values of the artist or genre dropdown, each found by typing a letter"""
+        picked = []
+        for _ in range(count):
+            data = self.callback(f'options/{kind}', callback_body(f'{kind}-dropdown.options', [
+                (f'{kind}-dropdown', 'search_value', self.rng.choice(string.ascii_lowercase)),
+                ('catalog-version', 'data', self.version)
+            ], [(f'{kind}-dropdown', 'value', picked)]))
+            try:
+                options = data['response'][f'{kind}-dropdown']['options']
+            except (TypeError, KeyError):
+                continue
+            options = [option['value'] for option in options if option['value'] not in picked]
+            if options:
+                picked.append(self.rng.choice(options))
+        return picked
+
+    def apply(self, case):
+        started = time.perf_counter()
+        data = self.callback('apply', apply_body(case))
+        try:
+            self.staged = data['response']['selection-store']['data']
+        except (TypeError, KeyError):
+            self.recorder.record('interaction/apply', time.perf_counter() - started, False)
+            return
+        for panel, body in panel_bodies(self.staged).items():
+            self.callback(panel, body)
+        self.recorder.record('interaction/apply', time.perf_counter() - started, True)
+
+    def change_features(self):
+        if self.staged is None:
+            return
+        features = self.rng.sample(FEATURES, self.rng.randint(1, len(FEATURES)))
+        self.callback('radar', callback_body('features-radar-data.data', [
+            ('selection-store', 'data', self.staged), ('feature-dropdown', 'value', features)
+        ]))
+
+    def run(self, actions, think):
+        dates = self.open_page()
+        self.apply({'start_date': dates[0], 'end_date': dates[1]})  # initial callbacks on page load
+        for _ in range(actions):
+            action = self.rng.choices(list(ACTIONS), weights=list(ACTIONS.values()))[0]
+            if action == 'apply':
+                self.apply(random_filters(self.rng, self.pick, dates))
+            elif action == 'features':
+                self.change_features()
+            else:
+                self.recorder.record('interaction/theme', 0.0, True)  # clientside: no server request
+            if think:
+                time.sleep(self.rng.uniform(0, 2 * think))
+
+
+def run_load(url, users, sessions, actions, think=0.0, seed=0, timeout=60):
+    """Replay `sessions` sessions with `users` concurrent analysts; returns the report"""
+    recorder = Recorder()
+    remaining = iter(range(sessions))
+    lock = threading.Lock()
+
+    def user():
+        while True:
+            with lock:
+                number = next(remaining, None)
+            if number is None:
+                return
+            Session(url, recorder, random.Random(seed * 1000003 + number), timeout).run(actions, think)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, daemon=True) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = recorder.report(time.perf_counter() - started)
+    report.update(users=users, sessions=sessions, actions_per_session=actions, think_seconds=think, seed=seed)
+    return report
+
+
+# ========== LOCAL SERVER ==========
+def start_server(kind, catalog, host, port, workers, threads):
+    """Start gunicorn or waitress serving the dashboard on `catalog`"""
+    env = dict(os.environ, CATALOG_PATH=os.path.abspath(catalog))
+    if kind == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+                   '--bind', f'{host}:{port}', 'spotifydashboard:server']
+    else:
+        command = [sys.executable, '-m', 'waitress', f'--listen={host}:{port}', f'--threads={threads}',
+                   'spotifydashboard:server']
+    return subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for_server(url, process, timeout=600, probe_timeout=5):
+    """Poll the layout until it answers 200; each probe gives up after `probe_timeout` seconds"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(url.rstrip('/') + '/_dash-layout', timeout=probe_timeout).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay dashboard sessions against a running server")
+    parser.add_argument('--url', default=None, help="dashboard to test (default: start one with --serve)")
+    parser.add_argument('--serve', choices=['gunicorn', 'waitress'], default='gunicorn',
+                        help="server started on a generated catalog when --url is not given")
+    parser.add_argument('--size', type=int, default=20000, help="songs in the generated catalog")
+    parser.add_argument('--data-dir', default='benchmark_data', help="where generated catalogs are kept")
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--workers', type=int, default=4, help="gunicorn worker processes")
+    parser.add_argument('--threads', type=int, default=4, help="threads per worker")
+    parser.add_argument('--users', type=int, default=10, help="concurrent simulated analysts")
+    parser.add_argument('--sessions', type=int, default=50, help="sessions replayed in total")
+    parser.add_argument('--actions', type=int, default=10, help="interactions per session")
+    parser.add_argument('--think', type=float, default=0.0, help="mean think time between interactions (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="also write the report as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    url, server = args.url, None
+    if url is None:
+        catalog = ensure_catalog(args.data_dir, args.size)
+        url = f'http://127.0.0.1:{args.port}'
+        server = start_server(args.serve, catalog, '127.0.0.1', args.port, args.workers, args.threads)
+    try:
+        wait_for_server(url, server)
+        print(f"Replaying {args.sessions} sessions with {args.users} concurrent users against {url}...")
+        report = run_load(url, args.users, args.sessions, args.actions, args.think, args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{report['requests']} requests in {report['elapsed_seconds']:.1f}s: "
+          f"{report['throughput_rps']:.1f} req/s, error rate {report['error_rate']:.2%}")
+    print(f"{'request':<28}{'n':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'errors':>8}")
+    for kind, stats in report['latency_ms'].items():
+        print(f"{kind:<28}{stats['n']:>7}{stats['p50']:>10.1f}{stats['p90']:>10.1f}"
+              f"{stats['p99']:>10.1f}{stats['max']:>10.1f}{stats['errors']:>8}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved as '{args.output}'")
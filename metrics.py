@@ -0,0 +1,94 @@
+import time
+from contextlib import contextmanager
+
+from forksafe import fork_safe_lock
+
+# Minimal Prometheus text-format metrics: histograms observed on the hot path
+# and gauges collected from callables when /metrics is scraped.
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+
+    def __init__(self, name, help, buckets=TIME_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}  # label items -> [bucket counts, sum, count]
+        self.lock = fork_safe_lock(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.items())
+        with self.lock:
+            series = self.series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self.series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            labels = dict(key)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{format_labels({**labels, "le": bound})} {bucket_count}')
+            lines.append(f'{self.name}_bucket{format_labels({**labels, "le": "+Inf"})} {count}')
+            lines.append(f'{self.name}_sum{format_labels(labels)} {total}')
+            lines.append(f'{self.name}_count{format_labels(labels)} {count}')
+        return lines
+
+
+class Collected:
+    """Gauge or counter whose values are read from `collect()` -> {labels tuple: value} at scrape time"""
+
+    def __init__(self, name, help, collect, type='gauge'):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.type = type
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        for labels, value in self.collect().items():
+            lines.append(f'{self.name}{format_labels(dict(labels))} {value}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def histogram(self, name, help, buckets=TIME_BUCKETS):
+        return self._add(Histogram(name, help, buckets))
+
+    def collected(self, name, help, collect, type='gauge'):
+        return self._add(Collected(name, help, collect, type))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
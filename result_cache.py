@@ -0,0 +1,178 @@
+import json
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+import pandas as pd
+
+from forksafe import fork_safe_lock
+
+
+def canonical_date(value):
+    return pd.Timestamp(value).date().isoformat() if value else None
+
+
+def normalize_selection(artists, genres, start_date, end_date):
+    """Canonical form of the row filters, as stored in the selection `dcc.Store`.
+
+    Artist and genre selections are order-insensitive, so they are sorted.
+    Dates are reduced to YYYY-MM-DD whatever format the date picker sent.
+    """
+    return {
+        'artists': sorted(artists or []),
+        'genres': sorted(genres or []),
+        'start_date': canonical_date(start_date),
+        'end_date': canonical_date(end_date)
+    }
+
+
+def cache_key(*parts):
+    """Stable string key for JSON-like parts (selections, feature lists, themes)"""
+    return json.dumps(parts, sort_keys=True, separators=(',', ':'))
+
+
+# ========== BACKENDS ==========
+class MemoryBackend:
+    """Per-process LRU store of pickled values"""
+
+    def __init__(self):
+        self.entries = OrderedDict()  # key -> (expires, blob)
+        self.total_bytes = 0
+        self.lock = fork_safe_lock(self)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._delete(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, blob, ttl, max_entries, max_bytes):
+        with self.lock:
+            if key in self.entries:
+                self._delete(key)
+            self.entries[key] = (time.time() + ttl, blob)
+            self.total_bytes += len(blob)
+            while self.entries and (len(self.entries) > max_entries or self.total_bytes > max_bytes):
+                self._delete(next(iter(self.entries)))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def _delete(self, key):
+        _, blob = self.entries.pop(key)
+        self.total_bytes -= len(blob)
+
+
+class SQLiteBackend:
+    """LRU store in a local SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value BLOB, size INTEGER, expires REAL, accessed REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+
+    def _connect(self):
+        # A connection per operation: safe across threads and forked workers
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT value, expires FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+            return row[0]
+
+    def set(self, key, blob, ttl, max_entries, max_bytes):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, blob, len(blob), now + ttl, now)
+            )
+            conn.execute('DELETE FROM results WHERE expires < ?', (now,))
+            # Evict least recently used entries until both budgets hold
+            while True:
+                count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+                if count <= max_entries and total <= max_bytes or count == 0:
+                    break
+                conn.execute(
+                    'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)',
+                    (max(1, count - max_entries),)
+                )
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM results')
+
+
+# ========== CACHE ==========
+class ResultCache:
+    """LRU/TTL cache of callback results with a total size budget.
+
+    Values are pickled, which both measures their size for eviction and
+    keeps cached figures safe from later mutation. The default backend is
+    in-process memory; pass a SQLite path to share results across workers.
+    """
+
+    def __init__(self, path=None, max_entries=512, max_bytes=64 * 1024**2, ttl=600):
+        self.backend = SQLiteBackend(path) if path else MemoryBackend()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Cached value for `key`, or None"""
+        blob = self.backend.get(key)
+        if blob is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(blob)
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) <= self.max_bytes:
+            self.backend.set(key, blob, self.ttl, self.max_entries, self.max_bytes)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+
+def cache_from_env(prefix='RESULT_CACHE'):
+    """ResultCache configured by <prefix>_PATH (SQLite file), <prefix>_MB and <prefix>_TTL"""
+    return ResultCache(
+        path=os.environ.get(f'{prefix}_PATH') or None,
+        max_bytes=int(float(os.environ.get(f'{prefix}_MB', '64')) * 1024**2),
+        ttl=float(os.environ.get(f'{prefix}_TTL', '600'))
+    )
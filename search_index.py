@@ -0,0 +1,197 @@
+import re
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from catalog_index import bitmap_count, group_rows, rows_to_bitmap
+
+# Search-as-you-type over track names and artists. Each distinct value is
+# folded (lowercase, no accents, transliteration variants merged, so
+# "Ishq"/"Ishk" and "Pyaar"/"Pyar" fold alike) and indexed by the trigrams of
+# its words. A query matches values that share enough of its trigrams; the
+# last query word is a prefix, since the user is still typing it.
+
+WORD_START = re.compile(r'\b\w')
+MAX_INDEXED_CHARS = 64  # longer values are indexed by their beginning
+FUZZY_MIN_SCORE = 0.5   # share of query trigrams a fuzzy match must contain
+
+# Spelling variants of romanized Hindi/Punjabi: single letters first, then
+# these patterns in order
+TRANSLITERATION_LETTERS = str.maketrans({'q': 'k', 'z': 'j', 'w': 'v', '_': ' '})
+TRANSLITERATION_RULES = [
+    (r'[^\w\s]', ' '),
+    (r'(?<=[bcdgjkpst])h+', ''),  # aspirates and sh: bh, chh, kh, sh, ... -> b, c, k, s
+    (r'ee', 'i'),
+    (r'oo', 'u'),
+    (r'(.)\1+', r'\1'),           # doubled letters: aa, bb, ll, ...
+    (r'iya', 'ia'),               # duniya -> dunia, kesariya -> kesaria
+    (r'\s+', ' ')
+]
+TRANSLITERATION_PATTERNS = [(re.compile(pattern), repl) for pattern, repl in TRANSLITERATION_RULES]
+
+
+def strip_accents(text):
+    if text.isascii():
+        return text
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def fold(text):
+    """Search form of `text`: lowercase, without accents or transliteration variants"""
+    text = strip_accents(str(text).lower()).translate(TRANSLITERATION_LETTERS)
+    for pattern, repl in TRANSLITERATION_PATTERNS:
+        text = pattern.sub(repl, text)
+    return text.strip()
+
+
+def trigram_code(a, b, c):
+    """One integer per trigram of code points (21 bits each)"""
+    return (np.uint64(a) << np.uint64(42)) | (np.uint64(b) << np.uint64(21)) | np.uint64(c)
+
+
+def query_trigrams(query):
+    """Distinct trigram codes of a query; the last word may be a prefix, so it gets no end marker"""
+    text = ' ' + fold(query)
+    if query[-1:].isspace():
+        text += ' '
+    points = [ord(c) for c in text]
+    return sorted({int(trigram_code(*points[i:i + 3])) for i in range(len(points) - 2)})
+
+
+class TrigramIndex:
+    """Trigram postings over the distinct values of one string column.
+
+    `postings[indptr[t]:indptr[t + 1]]` are the sorted ids of the values
+    containing trigram `trigrams[t]`; `order[bounds[v]:bounds[v + 1]]` are
+    the rows holding value `v`.
+    """
+
+    def __init__(self, values, first_row_id=0, chunk=100000):
+        values = values.astype(str).astype('category')
+        categories = pd.Series(values.cat.categories)
+        self.order, self.bounds = group_rows(values.cat.codes.to_numpy(), len(categories))
+        self.order = self.order + first_row_id
+
+        self.num_values = len(categories)
+        padded = pd.Series([f' {fold(value)} '[:MAX_INDEXED_CHARS] for value in categories])
+        codes, ids = [], []
+        for start in range(0, len(padded), chunk):
+            text = np.array(padded.iloc[start:start + chunk].tolist(), dtype=f'U{MAX_INDEXED_CHARS}')
+            points = text.view(np.uint32).reshape(len(text), MAX_INDEXED_CHARS).astype(np.uint64)
+            grams = trigram_code(points[:, :-2], points[:, 1:-1], points[:, 2:])
+            valid = points[:, 2:] != 0  # windows past the end of a value hold \0
+            codes.append(grams[valid])
+            ids.append(np.broadcast_to(np.arange(start, start + len(text))[:, None], grams.shape)[valid])
+        codes = np.concatenate(codes) if codes else np.array([], dtype=np.uint64)
+        ids = np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+
+        pairs = np.lexsort((ids, codes))
+        codes, ids = codes[pairs], ids[pairs]
+        distinct = np.ones(len(codes), dtype=bool)
+        distinct[1:] = (codes[1:] != codes[:-1]) | (ids[1:] != ids[:-1])
+        codes, self.postings = codes[distinct], ids[distinct].astype(np.int32)
+        self.trigrams, starts = np.unique(codes, return_index=True)
+        self.indptr = np.append(starts, len(codes))
+
+    def match(self, trigrams, min_score=FUZZY_MIN_SCORE):
+        """Ids of values containing at least `min_score` of `trigrams`, and the share each contains"""
+        lists = []
+        for code in trigrams:
+            t = np.searchsorted(self.trigrams, np.uint64(code))
+            found = t < len(self.trigrams) and self.trigrams[t] == code
+            lists.append(self.postings[self.indptr[t]:self.indptr[t + 1]] if found else self.postings[:0])
+        needed = max(1, int(np.ceil(min_score * len(lists))))
+        ids = np.concatenate(lists)
+        if len(ids) * 8 < self.num_values:
+            values, hits = np.unique(ids, return_counts=True)
+        else:  # many postings: count them in one dense pass
+            hits = np.bincount(ids, minlength=self.num_values)
+            values = np.flatnonzero(hits >= needed)
+            hits = hits[values]
+        keep = hits >= needed
+        return values[keep], hits[keep] / len(lists)
+
+    def rows(self, value_ids):
+        """Rows holding any of the values"""
+        starts = self.bounds[value_ids]
+        lengths = self.bounds[value_ids + 1] - starts
+        # Positions of all the values' slices of `order`, without a loop over values
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return self.order[np.arange(len(offsets)) + offsets]
+
+
+class SearchIndex:
+    """Track search over names and artists, ranked by a RankIndex (popularity).
+
+    Matches containing every query trigram come first, fuzzy matches after;
+    each tier is in rank order. Rows appended after the build are indexed
+    as separate parts.
+    """
+
+    def __init__(self, df, columns=('name', 'artist')):
+        self.columns = list(columns)
+        self.size = len(df)
+        self.parts = [[TrigramIndex(df[c]) for c in self.columns]]
+
+    def append(self, df, first_row_id):
+        self.parts.append([TrigramIndex(df[c], first_row_id) for c in self.columns])
+        self.size = first_row_id + len(df)
+
+    def match_bitmaps(self, query, min_score=FUZZY_MIN_SCORE):
+        """Bitmaps of the rows matching `query` exactly and only fuzzily, or None if it is too short"""
+        trigrams = query_trigrams(query)
+        if not trigrams:
+            return None
+        exact, fuzzy = [], []
+        for part in self.parts:
+            for index in part:
+                values, scores = index.match(trigrams, min_score)
+                exact.append(index.rows(values[scores == 1]))
+                fuzzy.append(index.rows(values[scores < 1]))
+        exact = rows_to_bitmap(np.concatenate(exact), self.size)
+        return exact, rows_to_bitmap(np.concatenate(fuzzy), self.size) & ~exact
+
+    def search(self, query, rank_index, offset=0, limit=10):
+        """Rows offset..offset + limit of the ranked matches of `query`, and the number of matches"""
+        bitmaps = self.match_bitmaps(query)
+        if bitmaps is None:
+            return np.array([], dtype=np.int64), 0
+        counts = [bitmap_count(bitmap) for bitmap in bitmaps]
+        rows = []
+        for bitmap, count in zip(bitmaps, counts):
+            if offset < count and limit > 0:
+                found = rank_index.top(offset + limit, bitmap)[offset:]
+                rows.append(found)
+                limit -= len(found)
+            offset = max(0, offset - count)
+        return (np.concatenate(rows) if rows else np.array([], dtype=np.int64)), sum(counts)
+
+
+class PrefixIndex:
+    """Dropdown options (artists, genres) starting with what the user typed.
+
+    A value matches when it, or one of its words, starts with the prefix,
+    ignoring case: "sin" finds "Arijit Singh". `keys` holds the lowercased
+    value from each word start, sorted, so a prefix is one binary search.
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+        entries = sorted(
+            (text[match.start():], i)
+            for i, text in enumerate(str(value).lower() for value in self.values)
+            for match in WORD_START.finditer(text)
+        )
+        self.keys = [key for key, _ in entries]
+        self.ids = np.array([i for _, i in entries], dtype=np.int64)
+
+    def match(self, prefix, limit):
+        """Up to `limit` matching values, in the order of `values` (all values if `prefix` is blank)"""
+        prefix = (prefix or '').lower().lstrip()
+        if not prefix:
+            return self.values[:limit]
+        start = bisect_left(self.keys, prefix)
+        stop = bisect_left(self.keys, prefix + '\U0010ffff', lo=start)
+        return [self.values[i] for i in np.unique(self.ids[start:stop])[:limit]]
@@ -0,0 +1,150 @@
+import fcntl
+import glob
+import io
+import mmap
+import os
+import pickle
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# Python objects (the catalog DataFrame and its indexes) are pickled with
+# protocol 5, which hands every contiguous NumPy/Arrow buffer out of band.
+# Those buffers go into one file, ideally on /dev/shm, and each process that
+# attaches maps the file copy-on-write: the arrays are views of pages shared
+# by every process on the host, and only pages a process writes to (e.g. by
+# ingesting new tracks) become private.
+#
+# Only what the manifest pickles in-band is copied into every process, so
+# publish() keeps large columns out of it: NumPy pickles datetime64 arrays
+# in-band, so they go as their int64 view, and plain string columns become
+# categoricals, whose codes and (Arrow) categories go out of band.
+#
+# Attaching unpickles the manifest, which can run arbitrary code, so the
+# directory and its files must belong to this user and be writable by no one
+# else: on a world-writable /dev/shm another user could otherwise create the
+# directory first and plant a manifest.
+
+ALIGNMENT = 64
+MANIFEST = 'state.pkl'
+
+
+def private_opener(path, flags):
+    return os.open(path, flags, 0o600)
+
+
+def check_private(path):
+    """Raise PermissionError unless `path` is owned by this user and not group/other writable"""
+    info = os.stat(path, follow_symlinks=False)
+    if info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(f"{path} must be owned by uid {os.getuid()} and writable only by it; "
+                              "refusing to load shared state from it")
+
+
+def as_dtype(values, dtype):
+    """`values` viewed as `dtype`, without a copy"""
+    return values.view(dtype)
+
+
+class StatePickler(pickle.Pickler):
+    """Protocol 5 pickler that hands datetime64/timedelta64 arrays out of band as their int64 view"""
+
+    def reducer_override(self, obj):
+        if type(obj) is np.ndarray and obj.dtype.kind in 'mM':
+            return as_dtype, (obj.view(np.int64), obj.dtype)
+        return NotImplemented
+
+
+def categorize_strings(frame):
+    """Make the plain string columns of `frame` categorical, in place"""
+    for column in frame.columns:
+        dtype = frame[column].dtype
+        if (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)) \
+                and not isinstance(dtype, pd.CategoricalDtype):
+            # Via objects, so the categories get pandas' default (Arrow when available) string dtype
+            frame[column] = pd.Categorical(np.asarray(frame[column], dtype=object))
+
+
+def publish(state, directory, source):
+    """Write `state` to `directory`: a manifest pickle plus one buffer file.
+
+    The string columns of DataFrames in `state` are made categorical in place.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    check_private(directory)
+    for value in (state.values() if isinstance(state, dict) else [state]):
+        if isinstance(value, pd.DataFrame):
+            categorize_strings(value)
+    buffers = []
+    pickled = io.BytesIO()
+    StatePickler(pickled, protocol=5, buffer_callback=buffers.append).dump(state)
+    data = pickled.getvalue()
+
+    name = f'buffers-{uuid.uuid4().hex}.bin'
+    layout = []
+    offset = 0
+    with open(os.path.join(directory, name), 'wb', opener=private_opener) as f:
+        for buffer in buffers:
+            raw = buffer.raw()
+            padding = -offset % ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            layout.append((offset, raw.nbytes))
+            f.write(raw)
+            offset += raw.nbytes
+
+    manifest = {'source': source, 'buffers': name, 'layout': layout, 'data': data}
+    path = os.path.join(directory, MANIFEST)
+    with open(path + '.tmp', 'wb', opener=private_opener) as f:
+        pickle.dump(manifest, f, protocol=5)
+    os.replace(path + '.tmp', path)
+
+    # Processes still attached to an older buffer file keep it alive until they exit
+    for old in glob.glob(os.path.join(directory, 'buffers-*.bin')):
+        if os.path.basename(old) != name:
+            os.remove(old)
+    return offset
+
+
+def attach(directory, source):
+    """State published in `directory` for `source`, or None if missing or stale"""
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    check_private(directory)
+    check_private(path)
+    with open(path, 'rb') as f:
+        manifest = pickle.load(f)
+    if manifest['source'] != source:
+        return None
+
+    buffers_path = os.path.join(directory, manifest['buffers'])
+    check_private(buffers_path)
+    with open(buffers_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        view = memoryview(mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY) if size else b'')
+    buffers = [view[offset:offset + nbytes] for offset, nbytes in manifest['layout']]
+    return pickle.loads(manifest['data'], buffers=buffers)
+
+
+def shared_state(directory, source, build):
+    """Attach to the state for `source` in `directory`, building and publishing it first if needed.
+
+    A file lock makes the first process (e.g. a preloading master or the first
+    worker) build the state while the others wait and then attach to it.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    check_private(directory)
+    with open(os.path.join(directory, 'lock'), 'w', opener=private_opener) as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            state = attach(directory, source)
+            if state is None:
+                nbytes = publish(build(), directory, source)
+                print(f"Published {nbytes / 1024**2:.1f} MB of catalog state to {directory}")
+                # Re-attach so this process also uses the shared pages, not its private build
+                state = attach(directory, source)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return state
@@ -0,0 +1,187 @@
+import numpy as np
+
+from catalog_index import bitmap_contains, bitmap_count, group_rows, sparse_bitmap_to_rows
+
+# Nearest neighbours by sound. Every track is a vector of its audio features,
+# standardized (tempo and loudness are not on the 0-1 scale of the others)
+# and scaled to unit length, so the dot product of two vectors is their
+# cosine similarity. Small catalogs are scanned exactly, in blocks. Large
+# ones are partitioned by a two-level k-means (an inverted file index): a
+# query scores the partition centroids and scans only the closest
+# partitions, whose vectors are stored contiguously.
+
+SIMILARITY_FEATURES = ['danceability', 'energy', 'speechiness', 'acousticness', 'instrumentalness',
+                       'liveness', 'valence', 'tempo', 'loudness']
+BLOCK_ROWS = 1 << 18
+PARTITION_MIN_ROWS = 2_000_000  # below this an exact scan takes a few milliseconds
+PROBES = 32
+# In a partitioned index, filters matching at most this many rows are
+# answered by an exact scan of just those rows: probing would find too few
+EXACT_FILTERED_ROWS = 8192
+
+
+def unit_rows(values):
+    norms = np.linalg.norm(values, axis=1, keepdims=True)
+    return values / np.maximum(norms, np.float32(1e-6))
+
+
+def nearest_centroid(vectors, centroids, block=1 << 16):
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        labels[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(vectors, k, rng, iterations=10, sample_per_centroid=256):
+    """Unit-length centroids of `k` clusters of unit `vectors`, trained on a sample"""
+    k = min(k, len(vectors))
+    train = vectors[rng.choice(len(vectors), min(len(vectors), k * sample_per_centroid), replace=False)]
+    centroids = train[rng.choice(len(train), k, replace=False)]
+    for _ in range(iterations):
+        labels = nearest_centroid(train, centroids)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.column_stack([np.bincount(labels, weights=train[:, d], minlength=k) for d in range(train.shape[1])])
+        filled = counts > 0  # an empty cluster keeps its old centroid
+        centroids[filled] = unit_rows(sums[filled].astype(np.float32))
+    return centroids
+
+
+def best(scores, rows, k):
+    """The `k` highest scores and their rows, highest first"""
+    if len(scores) > k:
+        top = np.argpartition(-scores, k)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return rows[top], scores[top]
+
+
+class SimilarityIndex:
+    """Top-K most similar tracks by audio features, optionally within a filter bitmap.
+
+    Vectors are stored in partition order; `row_ids` maps a stored vector to
+    its catalog row and `positions` maps a row back. Rows appended after the
+    build form an unpartitioned tail that every query scans exactly.
+    """
+
+    def __init__(self, df, columns=SIMILARITY_FEATURES, partitions=None, seed=0):
+        self.columns = [c for c in columns if c in df.columns]
+        values = self._values(df)
+        with np.errstate(invalid='ignore'):
+            self.mean = np.nan_to_num(np.nanmean(values, axis=0)).astype(np.float32) if len(values) \
+                else np.zeros(len(self.columns), dtype=np.float32)
+            std = np.nanstd(values, axis=0) if len(values) else np.ones(len(self.columns))
+        self.std = np.where(np.isfinite(std) & (std > 0), std, 1).astype(np.float32)
+        vectors = self._normalize(values)
+        self.size = len(vectors)
+
+        if partitions is None:
+            partitions = int(np.sqrt(self.size)) if self.size >= PARTITION_MIN_ROWS else 0
+        self.centroids = None
+        self.bounds = np.array([0, self.size])
+        self.row_ids = np.arange(self.size)
+        if partitions > 1 and self.size > partitions:
+            self.centroids, labels = self._partition(vectors, partitions, np.random.default_rng(seed))
+            self.row_ids, self.bounds = group_rows(labels, len(self.centroids))
+            vectors = vectors[self.row_ids]
+        self.vectors = vectors
+        self.indexed = self.size
+        self.positions = np.empty(self.size, dtype=np.int64)
+        self.positions[self.row_ids] = np.arange(self.size)
+
+    def _values(self, df):
+        return np.column_stack([df[c].to_numpy(dtype=np.float32, na_value=np.nan) for c in self.columns]) \
+            if len(self.columns) else np.zeros((len(df), 0), dtype=np.float32)
+
+    def _normalize(self, values):
+        values = (values - self.mean) / self.std
+        values[np.isnan(values)] = 0  # a missing feature sits at the catalog mean
+        return unit_rows(values)
+
+    def _partition(self, vectors, partitions, rng):
+        """Two-level k-means: sqrt(partitions) coarse cells, each split in sqrt(partitions).
+
+        Assigning every row costs two small centroid scans instead of one
+        against all partitions.
+        """
+        fanout = int(np.ceil(np.sqrt(partitions)))
+        coarse = spherical_kmeans(vectors, fanout, rng)
+        coarse_labels = nearest_centroid(vectors, coarse)
+        order, bounds = group_rows(coarse_labels, len(coarse))
+        centroids, labels = [], np.empty(len(vectors), dtype=np.int64)
+        for cell in range(len(coarse)):
+            rows = order[bounds[cell]:bounds[cell + 1]]
+            if not len(rows):
+                continue
+            fine = spherical_kmeans(vectors[rows], fanout, rng)
+            labels[rows] = nearest_centroid(vectors[rows], fine) + sum(len(c) for c in centroids)
+            centroids.append(fine)
+        return np.concatenate(centroids), labels
+
+    def append(self, df, first_row_id):
+        """Add rows appended to the catalog after the current ones to the exact-scan tail"""
+        vectors = self._normalize(self._values(df))
+        rows = np.arange(first_row_id, first_row_id + len(vectors))
+        self.positions = np.concatenate([self.positions, len(self.vectors) + np.arange(len(vectors))])
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.row_ids = np.concatenate([self.row_ids, rows])
+        self.size += len(vectors)
+
+    def _scan(self, query, positions, bitmap, k):
+        """Best `k` of the stored vectors at `positions` (an array or a slice), scanned in blocks"""
+        found_rows, found_scores = [], []
+        if isinstance(positions, slice):
+            chunks = [slice(start, min(start + BLOCK_ROWS, positions.stop))
+                      for start in range(positions.start, positions.stop, BLOCK_ROWS)]
+        else:
+            chunks = [positions[start:start + BLOCK_ROWS] for start in range(0, len(positions), BLOCK_ROWS)]
+        for chunk in chunks:
+            rows = self.row_ids[chunk]
+            scores = self.vectors[chunk] @ query
+            if bitmap is not None:
+                keep = bitmap_contains(bitmap, rows)
+                rows, scores = rows[keep], scores[keep]
+            rows, scores = best(scores, rows, k)
+            found_rows.append(rows)
+            found_scores.append(scores)
+        if not found_rows:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        return best(np.concatenate(found_scores), np.concatenate(found_rows), k)
+
+    def _probe(self, query, bitmap, k, probes):
+        """Best `k` from the closest partitions, probing more until `k` rows pass the filter"""
+        order = np.argsort(-(self.centroids @ query))
+        found_rows, found_scores = [], []
+        probed, count = 0, 0
+        while probed < len(order) and (probed < probes or count < k):
+            lists = order[probed:max(probes, 2 * probed)]
+            positions = np.concatenate([np.arange(self.bounds[p], self.bounds[p + 1]) for p in lists])
+            rows, scores = self._scan(query, positions, bitmap, k)
+            found_rows.append(rows)
+            found_scores.append(scores)
+            count += len(rows)
+            probed += len(lists)
+        return best(np.concatenate(found_scores), np.concatenate(found_rows), k)
+
+    def neighbours(self, row, k=10, bitmap=None, probes=PROBES):
+        """Row ids and cosine similarities of the `k` tracks that sound most like `row`.
+
+        With a `bitmap` (see FilterEngine.select_bitmap) only rows set in it
+        are returned. `row` itself is never returned.
+        """
+        query = self.vectors[self.positions[row]]
+        count = bitmap_count(bitmap) if bitmap is not None else self.size
+        if self.centroids is None:
+            # Gathering the filtered rows beats a masked scan of the catalog when they are few
+            if count * 8 <= self.size:
+                rows, scores = self._scan(query, self.positions[sparse_bitmap_to_rows(bitmap, self.size)], None, k + 1)
+            else:
+                rows, scores = self._scan(query, slice(0, len(self.vectors)), bitmap, k + 1)
+        elif count <= EXACT_FILTERED_ROWS:
+            rows, scores = self._scan(query, self.positions[sparse_bitmap_to_rows(bitmap, self.size)], None, k + 1)
+        else:
+            rows, scores = self._probe(query, bitmap, k + 1, probes)
+            tail_rows, tail_scores = self._scan(query, slice(self.indexed, len(self.vectors)), bitmap, k + 1)
+            rows, scores = best(np.concatenate([scores, tail_scores]), np.concatenate([rows, tail_rows]), k + 1)
+        keep = rows != row
+        return rows[keep][:k], scores[keep][:k]
@@ -1,12 +1,34 @@
 import dash
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, DiskcacheManager, Input, Output, State
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import plotly.graph_objects as go
+import flask
 import pandas as pd
 import numpy as np
+from dash.exceptions import PreventUpdate
 from datetime import datetime
+import cProfile
+import itertools
+import json
 import os
+import re
+import tempfile
+import threading
+import time
+from functools import lru_cache, partial
+from catalog_cube import GRANULARITIES, Aggregate, CatalogCube, TrendCube
+from catalog_index import FilterEngine, GenreIndex, RankIndex
+from export import EXPORT_FORMATS, csv_chunks, parquet_chunks, pq, row_chunks
+from figures import TRANSPARENT, donut, grouped_bar, payload_bytes, polar_area, time_series
+from ingest import DropDirectoryWatcher
+from metrics import BYTE_BUCKETS, Registry
+from result_cache import cache_from_env, cache_key, canonical_date, normalize_selection
+from search_index import PrefixIndex, SearchIndex
+from shared_state import shared_state
+from similarity_index import SimilarityIndex
+try:
+    import pyarrow.feather as feather
+except ImportError:  # only needed for Feather catalogs
+    feather = None
 
 # ========== THEME SETUP ==========
 THEMES = {
@@ -17,6 +39,7 @@ THEMES = {
         'secondary': '#1ED760',
         'text': '#FFFFFF',
         'muted': '#B3B3B3',
+        'grid': '#283442',
         'positive': '#1DB954',
         'negative': '#FF5733'
     },
@@ -27,12 +50,43 @@ THEMES = {
         'secondary': '#1ED760',
         'text': '#191414',
         'muted': '#6C757D',
+        'grid': '#E5E5E5',
         'positive': '#28A745',
         'negative': '#DC3545'
     }
 }
 
 FONT_FAMILY = "'Circular', 'Helvetica Neue', Helvetica, Arial, sans-serif"
+
+# Components are styled with CSS variables (var(--sd-text), ...) set on the
+# main container, so switching themes only restyles that one element
+THEME_VAR = {key: f'var(--sd-{key})' for key in THEMES['dark']}
+
+def container_style(theme):
+    return {
+        **{f'--sd-{key}': value for key, value in THEMES[theme].items()},
+        'backgroundColor': THEME_VAR['background'],
+        'color': THEME_VAR['text'],
+        'fontFamily': FONT_FAMILY,
+        'minHeight': '100vh',
+        'padding': '20px'
+    }
+
+# Layout overrides applied to the theme-neutral server figures in the browser
+THEME_LAYOUTS = {
+    theme: {
+        'font': {'family': FONT_FAMILY, 'color': colors['text']},
+        'piecolorway': [colors['muted'], colors['primary'], colors['secondary']],
+        'xaxis': {'gridcolor': colors['grid'], 'linecolor': colors['grid'], 'zerolinecolor': colors['grid']},
+        'yaxis': {'gridcolor': colors['grid'], 'linecolor': colors['grid'], 'zerolinecolor': colors['grid']},
+        'polar': {
+            'radialaxis': {'gridcolor': colors['grid'], 'linecolor': colors['grid']},
+            'angularaxis': {'gridcolor': colors['grid'], 'linecolor': colors['grid']}
+        },
+        'hoverlabel': {'bgcolor': colors['card'], 'font': {'color': colors['text']}}
+    }
+    for theme, colors in THEMES.items()
+}
 TITLE_STYLE = {
     'font-family': FONT_FAMILY,
     'font-weight': 'bold',
@@ -43,22 +97,303 @@ TITLE_STYLE = {
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 server = app.server
 
+# Heavy callbacks run as background jobs in local processes, with job state in
+# a diskcache directory: no Redis or Celery. Without diskcache (or with
+# BACKGROUND_JOBS=0) they run inline.
+BACKGROUND_JOBS_DIR = os.environ.get('BACKGROUND_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'spotifydashboard-jobs'))
+# The only background callback is the Apply stage. Its result cache is
+# read and filled here, in the web process: a repeated Apply is answered
+# without forking a job, and a job's result is cached in this process even
+# though the job itself runs in a fork with its own in-memory caches.
+NO_JOB = 0  # job id of an Apply answered from the cache
+
+class CatalogJobManager(DiskcacheManager):
+    def call_job_fn(self, key, job_fn, args, context):
+        # Jobs run in a fork of this process: only fork once the catalog is in it
+        catalog_ready.wait()
+        n_clicks, artists, genres, start_date, end_date = args
+        result = panel_caches['selection'].get(
+            cache_key('selection', applied_selection(artists, genres, start_date, end_date))
+        )
+        if result is not None:
+            self.handle.set(key, result)
+            return NO_JOB
+        return super().call_job_fn(key, job_fn, args, context)
+
+    def get_result(self, key, job):
+        result = super().get_result(key, job)
+        if isinstance(result, dict) and 'selection' in result and 'aggregate' in result:
+            panel_caches['selection'].set(cache_key('selection', result['selection']), result)
+        return result
+
+    def terminate_job(self, job):
+        if job is not None and int(job) != NO_JOB:
+            super().terminate_job(job)
+
+background_manager = None
+if os.environ.get('BACKGROUND_JOBS', '1') == '1':
+    try:
+        import diskcache
+        background_manager = CatalogJobManager(diskcache.Cache(BACKGROUND_JOBS_DIR))
+    except ImportError:  # needs diskcache, multiprocess and psutil
+        pass
+
+# One result cache per dashboard panel (plus the Apply stage); set
+# RESULT_CACHE_PATH to share them across workers and background jobs
+PANELS = ['selection', 'top-tracks', 'radar', 'mood', 'previews', 'kpis', 'similar', 'search', 'trends']
+panel_caches = {panel: cache_from_env() for panel in PANELS}
+
+# Serialized size of each panel's last computed response
+panel_payload_bytes = {}
+
+@server.route('/cache-stats')
+def cache_stats():
+    return {
+        panel: {**cache.stats(), 'payload_bytes': panel_payload_bytes.get(panel)}
+        for panel, cache in panel_caches.items()
+    }
+
+# ========== INSTRUMENTATION ==========
+# Stage timers, payload sizes, cache hit ratios and callback latencies of this
+# worker at /metrics (Prometheus text format). Work done in background jobs
+# is timed in the job's process and is not reported.
+metrics = Registry()
+stage_seconds = metrics.histogram(
+    'dashboard_stage_seconds', 'Time spent in each stage of a dashboard update'
+)
+panel_payload = metrics.histogram(
+    'dashboard_payload_bytes', 'Serialized size of computed panel responses', BYTE_BUCKETS
+)
+request_seconds = metrics.histogram(
+    'dashboard_request_seconds', 'Latency of Dash callback requests by output'
+)
+metrics.collected(
+    'dashboard_cache_hits_total', 'Result cache hits by panel',
+    lambda: {(('panel', panel),): cache.hits for panel, cache in panel_caches.items()}, type='counter'
+)
+metrics.collected(
+    'dashboard_cache_misses_total', 'Result cache misses by panel',
+    lambda: {(('panel', panel),): cache.misses for panel, cache in panel_caches.items()}, type='counter'
+)
+metrics.collected(
+    'dashboard_cache_hit_ratio', 'Result cache hit ratio by panel',
+    lambda: {(('panel', panel),): cache.stats()['hit_ratio'] for panel, cache in panel_caches.items()}
+)
+metrics.collected(
+    'dashboard_catalog_rows', 'Tracks in the loaded catalog (0 while loading)',
+    lambda: {(): len(df) if catalog_ready.is_set() else 0}
+)
+
+@server.route('/metrics')
+def metrics_endpoint():
+    return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# With PROFILE_DIR set, each callback request can be profiled into
+# <PROFILE_DIR>/<time>-<pid>-<n>-<output>.prof; toggle with /profile?enabled=0|1
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+profile_requests = threading.Event()
+profile_count = itertools.count()
+if PROFILE_DIR:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile_requests.set()
+
+@server.route('/profile')
+def profile_toggle():
+    enabled = flask.request.args.get('enabled')
+    if enabled is not None and PROFILE_DIR:
+        profile_requests.set() if enabled == '1' else profile_requests.clear()
+    return {'profile_dir': PROFILE_DIR, 'enabled': profile_requests.is_set()}
+
+@server.before_request
+def start_request_timer():
+    if not flask.request.path.endswith('/_dash-update-component'):
+        return
+    flask.g.request_start = time.perf_counter()
+    if profile_requests.is_set():
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another request's profiler is active in this process
+            return
+        flask.g.profiler = profiler
+
+@server.after_request
+def record_request(response):
+    start = flask.g.pop('request_start', None)
+    if start is None:
+        return response
+    output = (flask.request.get_json(silent=True) or {}).get('output', '')
+    request_seconds.observe(time.perf_counter() - start, output=output)
+    profiler = flask.g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', output)[:80]
+        profiler.dump_stats(os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(profile_count)}-{name}.prof"))
+    return response
+
 # ========== DATA LOADING ==========
-def load_data():
-    """Load data from the 20k songs CSV file"""
+DATA_FILE = os.environ.get('CATALOG_PATH', 'indian_music_20k.csv')
+MEMORY_MAP = os.environ.get('CATALOG_MEMORY_MAP', '0') == '1'
+
+def find_catalog_file(path=DATA_FILE):
+    """Prefer a typed Parquet/Feather copy of the catalog next to the CSV, unless the CSV is newer"""
+    base, ext = os.path.splitext(path)
+    for candidate in [base + '.parquet', base + '.feather', base + '.arrow']:
+        if candidate != path and os.path.exists(candidate):
+            if os.path.exists(path) and os.path.getmtime(path) > os.path.getmtime(candidate):
+                continue  # a stale copy of a regenerated CSV
+            return candidate
+    return path
+
+def read_catalog(path, memory_map=False):
+    """Read a CSV, Parquet or Feather catalog file"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        return pd.read_parquet(path, memory_map=memory_map)
+    if ext in ('.feather', '.arrow'):
+        if feather is None:
+            raise ImportError(f"Reading {path} needs pyarrow")
+        return feather.read_table(path, memory_map=memory_map).to_pandas()
+    return pd.read_csv(path, parse_dates=['release_date'])
+
+# URLs the generator derives from the row id; they are dropped at load time
+# and rebuilt on demand for the handful of rows that are displayed
+IMAGE_URL = 'https://picsum.photos/300/300?random={}'
+PREVIEW_URL = 'https://example.com/preview/{}'
+
+AUDIO_FEATURES = [
+    'duration_min', 'danceability', 'energy', 'loudness', 'speechiness',
+    'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo'
+]
+
+def memory_mb(df):
+    """Deep memory usage of a DataFrame in MB"""
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+def matches_row_ids(column, template):
+    """True if every non-null value of `column` is `template` filled with its row id"""
+    values = column.dropna()
+    expected = template.format('') + values.index.astype(str)
+    return bool((values.astype(str) == expected).all())
+
+def normalize_catalog(df, max_category_ratio=0.5, first_row_id=0):
+    """Shrink the catalog in memory: categoricals for low-cardinality strings,
+    downcast numerics and drop URL columns that can be derived from the row id"""
+    df = df.reset_index(drop=True)
+    df.index = pd.RangeIndex(first_row_id, first_row_id + len(df))
+    
+    if 'image_url' in df.columns and matches_row_ids(df['image_url'], IMAGE_URL):
+        df = df.drop(columns='image_url')
+    if 'preview_url' in df.columns and matches_row_ids(df['preview_url'], PREVIEW_URL):
+        df['has_preview'] = df['preview_url'].notna()
+        df = df.drop(columns='preview_url')
+    
+    for column in df.columns:
+        series = df[column]
+        if column in AUDIO_FEATURES:
+            df[column] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            df[column] = pd.to_numeric(series, downcast='integer')
+        elif (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)) \
+                and not isinstance(series.dtype, pd.CategoricalDtype) \
+                and series.nunique() <= max_category_ratio * max(len(series), 1):
+            df[column] = series.astype('category')
+    return df
+
+def track_image_url(row):
+    """Album art URL of a catalog row (a Series named by its row id)"""
+    if pd.notna(row.get('image_url')):
+        return row['image_url']
+    return IMAGE_URL.format(row.name)
+
+def track_preview_url(row):
+    """Preview URL of a catalog row, or None"""
+    if pd.notna(row.get('preview_url')):
+        return row['preview_url']
+    return PREVIEW_URL.format(row.name) if row.get('has_preview') is True else None
+
+def catalog_rows(rows):
+    """Normalized catalog rows as they were in the catalog file: the URL
+    columns normalize_catalog dropped are rebuilt from the row ids"""
+    ids = rows.index.astype(str)
+    restored = {}
+    if 'has_preview' in rows.columns:
+        restored['preview_url'] = pd.Series(PREVIEW_URL.format('') + ids, index=rows.index).where(rows['has_preview'])
+    if 'image_url' not in rows.columns:
+        restored['image_url'] = IMAGE_URL.format('') + ids
+    rows = rows.drop(columns='has_preview', errors='ignore')
+    at = rows.columns.get_loc('language') if 'language' in rows.columns else len(rows.columns)
+    for offset, (column, values) in enumerate(restored.items()):
+        rows.insert(at + offset, column, values)
+    return rows
+
+def prepare_catalog(df, first_row_id=0):
+    """Fix up the types of freshly read catalog rows and normalize them"""
+    # Ensure proper data types, whatever the file format stored them as
+    df['explicit'] = df['explicit'].astype(bool)
+    if 'release_date' in df.columns:
+        df['release_date'] = pd.to_datetime(df['release_date'])
+    
+    # Create duration in minutes if not present
+    if 'duration_min' not in df.columns and 'duration_ms' in df.columns:
+        df['duration_min'] = df['duration_ms'] / 60000
+    
+    return normalize_catalog(df, first_row_id=first_row_id)
+
+def conform_batch(df, batch):
+    """A normalized batch checked and cast against the catalog's columns.
+
+    Raises ValueError when a catalog column is missing or holds values of
+    another kind, before anything is appended.
+    """
+    missing = [c for c in df.columns if c not in batch.columns and c != 'has_preview']
+    if missing:
+        raise ValueError(f"batch lacks the catalog columns {', '.join(missing)}")
+    batch = batch.copy()
+    for column in df.columns.intersection(batch.columns):
+        dtype = df[column].dtype
+        try:
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                batch[column] = pd.to_datetime(batch[column]).astype(dtype)
+            elif pd.api.types.is_bool_dtype(dtype):
+                batch[column] = batch[column].astype(bool)
+            elif pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_numeric_dtype(batch[column]):
+                batch[column] = pd.to_numeric(batch[column])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"batch column {column} does not fit the catalog's {dtype}: {e}") from e
+    return batch
+
+def append_catalog(df, batch):
+    """Append normalized rows to the catalog, extending categories instead of falling back to strings"""
+    df = df.copy(deep=False)  # the caller's frame is left as it was
+    batch = batch.copy()
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype) and column in batch.columns:
+            new_values = pd.Index(batch[column].dropna().unique()).difference(df[column].cat.categories)
+            if len(new_values):
+                df[column] = df[column].cat.add_categories(new_values)
+            batch[column] = pd.Categorical(batch[column], categories=df[column].cat.categories)
+    df = pd.concat([df, batch])
+    if 'has_preview' in df.columns:
+        df['has_preview'] = df['has_preview'].fillna(False).astype(bool)
+    return df
+
+def load_data(path=DATA_FILE, memory_map=MEMORY_MAP):
+    """Load the songs catalog, preferring the columnar file over the CSV"""
     try:
-        df = pd.read_csv('indian_music_20k.csv', parse_dates=['release_date'])
-        
-        # Ensure proper data types
-        df['explicit'] = df['explicit'].astype(bool)
+        path = find_catalog_file(path)
+        df = read_catalog(path, memory_map)
         
-        # Create duration in minutes if not present
-        if 'duration_min' not in df.columns and 'duration_ms' in df.columns:
-            df['duration_min'] = df['duration_ms'] / 60000
+        # Typed, compact in-memory representation
+        before = memory_mb(df)
+        df = prepare_catalog(df)
+        print(f"Catalog memory: {before:.1f} MB -> {memory_mb(df):.1f} MB after normalization")
             
-        print(f"Successfully loaded dataset with {len(df)} songs")
+        print(f"Successfully loaded dataset with {len(df)} songs from {path}")
         return df
     
+    except ImportError:
+        raise  # a missing reader library is a setup error, not an empty catalog
     except Exception as e:
         print(f"Error loading dataset: {e}")
         # Fallback to empty dataframe with expected columns
@@ -68,22 +403,208 @@ def load_data():
             'artist_genres', 'release_date', 'image_url', 'mood'
         ])
 
-# Load data
-df = load_data()
+# ========== CATALOG STATE ==========
+# With SHARED_CATALOG_DIR (e.g. /dev/shm/spotifydashboard) the catalog and its
+# indexes are built once per host and every worker attaches to the same
+# memory-mapped arrays instead of loading a private copy
+SHARED_CATALOG_DIR = os.environ.get('SHARED_CATALOG_DIR')
+
+# Rows ordered by each "top by" column, so top-K under a filter is a short walk
+RANKED_COLUMNS = ['popularity']
+
+def build_catalog_state(path=DATA_FILE):
+    """Load the catalog and build its filter indexes, cubes, rank indexes, similarity and search indexes"""
+    return build_indexes(load_data(path))
+
+def build_indexes(df):
+    """Catalog state of a normalized catalog: `df` and every index built over it"""
+    genre_index = GenreIndex(df['artist_genres'])
+    filter_engine = FilterEngine(df, genre_index)
+    cube = CatalogCube(df, filter_engine)
+    return {
+        'df': df,
+        'genre_index': genre_index,
+        'filter_engine': filter_engine,
+        'cube': cube,
+        'trend_cube': TrendCube(df, cube, filter_engine),
+        'rank_indexes': {column: RankIndex(df[column]) for column in RANKED_COLUMNS},
+        'similarity_index': SimilarityIndex(df),
+        'search_index': SearchIndex(df)
+    }
+
+def catalog_source(path=DATA_FILE):
+    """Identity of the catalog file; a shared state built from another file or version is rebuilt"""
+    path = find_catalog_file(path)
+    if not os.path.exists(path):
+        return (path, None, None)
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+# ========== LAZY STARTUP ==========
+# The catalog loads in a background thread so the server can bind its port
+# right away. Until it is ready, the layout is built from a metadata sidecar
+# (<catalog file>.meta.json: the first artists and genres, date bounds and
+# overall KPIs) written by the previous start, and callbacks that need rows
+# wait for it.
+CATALOG_LAZY_LOAD = os.environ.get('CATALOG_LAZY_LOAD', '1') == '1'
+catalog_ready = threading.Event()
+df = genre_index = filter_engine = cube = trend_cube = rank_indexes = similarity_index = search_index = None
+
+def metadata_path(path=DATA_FILE):
+    return find_catalog_file(path) + '.meta.json'
+
+def read_metadata(path=DATA_FILE):
+    """Sidecar metadata of the catalog file, or None if missing or stale"""
+    try:
+        with open(metadata_path(path)) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return metadata if metadata.get('source') == list(catalog_source(path)) else None
+
+# The layout only ships the first OPTION_LIMIT artists and genres, so its
+# size does not grow with the catalog; the dropdowns fetch the rest as the
+# user types (see dropdown_options)
+OPTION_LIMIT = 50
+
+@lru_cache(maxsize=1)
+def live_metadata(version):
+    """Layout metadata of the loaded catalog; `version` is the catalog size"""
+    with catalog_lock:
+        dates = filter_engine.sorted_dates
+        return {
+            'source': list(catalog_source()),
+            'rows': len(df),
+            'aggregate': cube.query().to_dict(),
+            'artists': filter_engine.artists[:OPTION_LIMIT],
+            'genres': genre_index.genres[:OPTION_LIMIT],
+            'min_date': pd.Timestamp(dates[0]).date().isoformat() if len(dates) else None,
+            'max_date': pd.Timestamp(dates[-1]).date().isoformat() if len(dates) else None
+        }
+
+def catalog_metadata():
+    """Layout metadata: from the loaded catalog, else the sidecar, else wait for the load"""
+    if not catalog_ready.is_set():
+        metadata = read_metadata()
+        if metadata is not None:
+            return metadata
+        catalog_ready.wait()
+    return live_metadata(len(df))
+
+def write_metadata(metadata, path=DATA_FILE):
+    try:
+        with open(metadata_path(path) + '.tmp', 'w') as f:
+            json.dump(metadata, f)
+        os.replace(metadata_path(path) + '.tmp', metadata_path(path))
+    except OSError as e:
+        print(f"Could not write catalog metadata: {e}")
+
+def load_catalog():
+    """Load (or attach to) the catalog state, then publish it to the module globals"""
+    if SHARED_CATALOG_DIR:
+        catalog = shared_state(SHARED_CATALOG_DIR, catalog_source(), build_catalog_state)
+        catalog['cube'].refresh(catalog['df'], catalog['filter_engine'])
+        catalog['trend_cube'].refresh(catalog['df'], catalog['filter_engine'])
+        print(f"Attached to the shared catalog in {SHARED_CATALOG_DIR} ({len(catalog['df'])} songs)")
+    else:
+        catalog = build_catalog_state()
+    publish_catalog(catalog)
+    catalog_ready.set()
+    if read_metadata() is None:
+        write_metadata(live_metadata(len(df)))
+    option_indexes(len(df))  # ready for the first keystroke in a dropdown
+    start_ingest()
+
+def publish_catalog(catalog):
+    """Make a catalog state (see build_catalog_state) the one callbacks use"""
+    global df, genre_index, filter_engine, cube, trend_cube, rank_indexes, similarity_index, search_index
+    with catalog_lock:
+        df = catalog['df']
+        genre_index = catalog['genre_index']
+        filter_engine = catalog['filter_engine']
+        cube = catalog['cube']
+        trend_cube = catalog['trend_cube']
+        rank_indexes = catalog['rank_indexes']
+        similarity_index = catalog['similarity_index']
+        search_index = catalog['search_index']
+
+def start_catalog_load():
+    if CATALOG_LAZY_LOAD:
+        threading.Thread(target=load_catalog, name='catalog-loader', daemon=True).start()
+    else:
+        load_catalog()
+
+def restart_catalog_load():
+    # A process forked mid-load (e.g. a worker of a preloading master) has no
+    # loader thread: load (or, when shared, attach to) the catalog again
+    if not catalog_ready.is_set():
+        start_catalog_load()
+
+os.register_at_fork(after_in_child=restart_catalog_load)
+
+# ========== INCREMENTAL INGESTION ==========
+# New track batches dropped into INGEST_DIR (CSV/Parquet/Feather) are appended
+# to the catalog, and the indexes and cube are updated in place with just the
+# new rows. The catalog lock keeps callbacks from reading a half-updated state.
+INGEST_DIR = os.environ.get('INGEST_DIR')
+INGEST_POLL_SECONDS = float(os.environ.get('INGEST_POLL_SECONDS', '30'))
+catalog_lock = threading.RLock()
+# Background jobs are forked from a threaded server: fork only between
+# catalog updates, so no child inherits the lock held by a thread it lacks
+os.register_at_fork(before=catalog_lock.acquire, after_in_parent=catalog_lock.release,
+                    after_in_child=catalog_lock.release)
+
+def ingest_tracks(batch):
+    """Append a batch of new tracks to the catalog, the filter indexes and the cubes.
+
+    A batch that does not fit the catalog is rejected before anything
+    changes. Should an index still fail part way, every index is rebuilt
+    from the catalog as it was, so they never disagree about its rows.
+    """
+    global df
+    with catalog_lock:
+        previous = df
+        batch = conform_batch(df, prepare_catalog(batch, first_row_id=len(df)))
+        try:
+            df = append_catalog(df, batch)
+            filter_engine.append(batch)
+            cube.append(batch, df, filter_engine)
+            trend_cube.append(batch, df, filter_engine)
+            for column, rank_index in rank_indexes.items():
+                rank_index.append(batch[column], len(df) - len(batch))
+            similarity_index.append(batch, len(df) - len(batch))
+            search_index.append(batch, len(df) - len(batch))
+        except Exception:
+            print(f"Ingest failed part way; rebuilding the indexes of the {len(previous)} songs before it")
+            publish_catalog(build_indexes(previous))
+            raise
+    print(f"Ingested {len(batch)} songs, catalog now has {len(df)}")
+
+def ingest_file(path):
+    ingest_tracks(read_catalog(path))
+
+def start_ingest():
+    """Watch INGEST_DIR, if set, once the catalog has loaded"""
+    if INGEST_DIR:
+        os.makedirs(INGEST_DIR, exist_ok=True)
+        DropDirectoryWatcher(INGEST_DIR, ingest_file, INGEST_POLL_SECONDS).start()
+
+def select_columns(columns, rows):
+    """Only the requested columns of the selected rows (row ids are positions in df)"""
+    return df[columns].take(rows)
 
 # ========== UI COMPONENTS ==========
-def create_kpi_card(title, value, delta=None, id=None, theme='dark'):
+def create_kpi_card(title, value, delta=None, id=None):
     """Create a KPI card with optional delta indicator"""
-    theme_data = THEMES[theme]
     return dbc.Card([
         dbc.CardBody([
             html.H6(title, style={
-                'color': theme_data['muted'],
+                'color': THEME_VAR['muted'],
                 'font-family': FONT_FAMILY,
                 'margin-bottom': '5px'
             }),
             html.H3(value if id is None else html.Div(id=id), style={
-                'color': theme_data['text'],
+                'color': THEME_VAR['text'],
                 'font-family': FONT_FAMILY,
                 'margin': '10px 0'
             }),
@@ -92,22 +613,21 @@ def create_kpi_card(title, value, delta=None, id=None, theme='dark'):
                 html.I(className="fas fa-arrow-down") if delta and delta < 0 else "",
                 f" {abs(delta)}%" if delta else ""
             ], style={
-                'color': theme_data['positive'] if delta and delta > 0 else 
-                        theme_data['negative'] if delta and delta < 0 else 
-                        theme_data['muted']
+                'color': THEME_VAR['positive'] if delta and delta > 0 else 
+                        THEME_VAR['negative'] if delta and delta < 0 else 
+                        THEME_VAR['muted']
             })
         ])
     ], style={
         'borderRadius': '12px',
-        'backgroundColor': theme_data['card'],
+        'backgroundColor': THEME_VAR['card'],
         'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
         'height': '100%',
         'padding': '15px'
     })
 
-def create_track_preview(image_url, track_name, artist, preview_url, theme):
+def create_track_preview(image_url, track_name, artist, preview_url):
     """Create track preview component"""
-    theme_data = THEMES[theme]
     return dbc.Card([
         dbc.CardBody([
             html.Div([
@@ -124,11 +644,11 @@ def create_track_preview(image_url, track_name, artist, preview_url, theme):
                 html.Div([
                     html.H5(track_name, style={
                         'marginBottom': '5px',
-                        'color': theme_data['text'],
+                        'color': THEME_VAR['text'],
                         'fontFamily': FONT_FAMILY
                     }),
                     html.P(artist, style={
-                        'color': theme_data['muted'],
+                        'color': THEME_VAR['muted'],
                         'marginBottom': '10px',
                         'fontFamily': FONT_FAMILY
                     }),
@@ -139,7 +659,7 @@ def create_track_preview(image_url, track_name, artist, preview_url, theme):
                     ) if preview_url else html.P(
                         "Preview not available",
                         style={
-                            'color': theme_data['muted'],
+                            'color': THEME_VAR['muted'],
                             'fontFamily': FONT_FAMILY
                         }
                     )
@@ -151,404 +671,952 @@ def create_track_preview(image_url, track_name, artist, preview_url, theme):
         ])
     ], style={
         'marginBottom': '15px',
-        'backgroundColor': theme_data['card'],
+        'backgroundColor': THEME_VAR['card'],
         'borderRadius': '12px'
     })
 
+def create_track_row(track_name, artist, value, label=None):
+    """One row of a track list: name and artist, with `value` (e.g. "87%") on the right and `label` as its tooltip"""
+    return html.Div([
+        html.Div([
+            html.Div(track_name, style={
+                'color': THEME_VAR['text'],
+                'fontFamily': FONT_FAMILY,
+                'fontWeight': 'bold'
+            }),
+            html.Small(artist, style={
+                'color': THEME_VAR['muted'],
+                'fontFamily': FONT_FAMILY
+            })
+        ], style={'flex': 1}),
+        html.Span(value, title=label, style={
+            'color': THEME_VAR['primary'],
+            'fontFamily': FONT_FAMILY,
+            'fontWeight': 'bold'
+        })
+    ], style={
+        'display': 'flex',
+        'alignItems': 'center',
+        'padding': '8px 0',
+        'borderBottom': f"1px solid {THEME_VAR['muted']}"
+    })
+
+def kpi_values(agg):
+    """Total tracks, average popularity and duration, top genre, explicit % and energy index"""
+    avg_popularity = round(agg.mean('popularity'), 1)
+    avg_duration = f"{round(agg.mean('duration_min'), 1)} min"
+    explicit_pct = round(agg.mean('explicit') * 100, 1)
+    # Energy index (custom metric)
+    energy_index = round(agg.mean('energy') * 100, 1)
+    return (
+        agg.count,
+        avg_popularity,
+        avg_duration,
+        agg.top_genre,
+        f"{explicit_pct}%",
+        f"{energy_index}"
+    )
+
 # ========== APP LAYOUT ==========
-app.layout = html.Div([
-    dcc.Store(id='theme-store', data='dark'),
-    dcc.Loading(id="loading-spinner", type="circle", fullscreen=True),
+# Spinners are per panel (not fullscreen) so the rest of the page stays usable
+APPLY_PROGRESS_STYLE = {'height': '4px', 'marginTop': '10px'}
+SEARCH_DEBOUNCE_SECONDS = 0.3
+SEARCH_PAGE_SIZE = 10
+
+def build_layout(metadata):
+    """Page layout from the catalog metadata (see catalog_metadata)"""
+    kpis = kpi_values(Aggregate.from_dict(metadata['aggregate']))
+    return html.Div([
+        dcc.Store(id='theme-store', data='dark'),
+        dcc.Store(id='catalog-version', data=metadata['rows']),
+        dcc.Store(id='selection-store'),
+        dcc.Store(id='top-tracks-chart-data'),
+        dcc.Store(id='features-radar-data'),
+        dcc.Store(id='mood-chart-data'),
+        dcc.Store(id='trends-chart-data'),
+        dcc.Interval(id='catalog-poll', interval=INGEST_POLL_SECONDS * 1000, disabled=not INGEST_DIR),
     
-    # Main container
-    html.Div([
-        # Header with theme toggle
-        dbc.Row([
-            dbc.Col([
-                html.H1("Spotify India Analytics", style={
-                    **TITLE_STYLE,
-                    'font-size': '2.5rem',
-                    'background': 'linear-gradient(90deg, #1DB954, #1ED760)',
-                    '-webkit-background-clip': 'text',
-                    '-webkit-text-fill-color': 'transparent',
-                    'margin-bottom': '0'
-                }),
-                html.P("Explore trends across 20,000 Indian songs", style={
-                    'color': THEMES['dark']['muted'],
-                    'font-family': FONT_FAMILY,
-                    'margin-top': '5px'
-                })
-            ], md=10),
-            dbc.Col([
-                dbc.Switch(
-                    id='theme-toggle',
-                    label="Dark Mode",
-                    value=True,
-                    style={'float': 'right'},
-                    label_style={'font-family': FONT_FAMILY}
-                )
-            ], md=2)
-        ], className="mb-4"),
+        # Main container
+        html.Div([
+            # Header with theme toggle
+            dbc.Row([
+                dbc.Col([
+                    html.H1("Spotify India Analytics", style={
+                        **TITLE_STYLE,
+                        'font-size': '2.5rem',
+                        'background': 'linear-gradient(90deg, #1DB954, #1ED760)',
+                        '-webkit-background-clip': 'text',
+                        '-webkit-text-fill-color': 'transparent',
+                        'margin-bottom': '0'
+                    }),
+                    html.P(f"Explore trends across {metadata['rows']:,} Indian songs", style={
+                        'color': THEME_VAR['muted'],
+                        'font-family': FONT_FAMILY,
+                        'margin-top': '5px'
+                    })
+                ], md=10),
+                dbc.Col([
+                    dbc.Switch(
+                        id='theme-toggle',
+                        label="Dark Mode",
+                        value=True,
+                        style={'float': 'right'},
+                        label_style={'font-family': FONT_FAMILY}
+                    )
+                ], md=2)
+            ], className="mb-4"),
         
-        # KPI Row
-        dbc.Row([
-            dbc.Col(create_kpi_card("Total Tracks", len(df), id='kpi-total-tracks'), md=2),
-            dbc.Col(create_kpi_card("Avg Popularity", round(df['popularity'].mean(), 1), id='kpi-avg-popularity'), md=2),
-            dbc.Col(create_kpi_card("Avg Duration", f"{round(df['duration_min'].mean(), 1)} min", id='kpi-avg-duration'), md=2),
-            dbc.Col(create_kpi_card("Top Genre", df['artist_genres'].str.split(', ').explode().value_counts().index[0], id='kpi-top-genre'), md=2),
-            dbc.Col(create_kpi_card("Explicit %", f"{round(df['explicit'].mean()*100, 1)}%", id='kpi-explicit-pct'), md=2),
-            dbc.Col(create_kpi_card("Energy Index", round(df['energy'].mean()*100, 1), id='kpi-energy-index'), md=2),
-        ], className="mb-4"),
+            # KPI Row
+            dbc.Row([
+                dbc.Col(create_kpi_card("Total Tracks", kpis[0], id='kpi-total-tracks'), md=2),
+                dbc.Col(create_kpi_card("Avg Popularity", kpis[1], id='kpi-avg-popularity'), md=2),
+                dbc.Col(create_kpi_card("Avg Duration", kpis[2], id='kpi-avg-duration'), md=2),
+                dbc.Col(create_kpi_card("Top Genre", kpis[3], id='kpi-top-genre'), md=2),
+                dbc.Col(create_kpi_card("Explicit %", kpis[4], id='kpi-explicit-pct'), md=2),
+                dbc.Col(create_kpi_card("Energy Index", kpis[5], id='kpi-energy-index'), md=2),
+            ], className="mb-4"),
         
-        # Main content
-        dbc.Row([
-            # Filters column
-            dbc.Col([
-                dbc.Card([
-                    dbc.CardHeader("Filters", style={
-                        'font-family': FONT_FAMILY,
-                        'font-weight': 'bold',
-                        'color': THEMES['dark']['primary'],
-                        'border-bottom': f'1px solid {THEMES["dark"]["muted"]}'
-                    }),
-                    dbc.CardBody([
-                        dbc.Row([
-                            dbc.Col([
-                                html.Label("Artists", style={'font-family': FONT_FAMILY}),
-                                dcc.Dropdown(
-                                    id='artist-dropdown',
-                                    options=[{'label': a, 'value': a} for a in sorted(df['artist'].unique())],
-                                    multi=True,
-                                    placeholder="All Artists",
-                                    style={'font-family': FONT_FAMILY}
-                                )
-                            ], md=6),
-                            dbc.Col([
-                                html.Label("Genres", style={'font-family': FONT_FAMILY}),
-                                dcc.Dropdown(
-                                    id='genre-dropdown',
-                                    options=[{'label': g, 'value': g} for g in sorted(set(g for sublist in df['artist_genres'].str.split(', ') for g in sublist))],
-                                    multi=True,
-                                    placeholder="All Genres",
-                                    style={'font-family': FONT_FAMILY}
-                                )
-                            ], md=6)
-                        ]),
-                        html.Br(),
-                        dbc.Row([
-                            dbc.Col([
-                                html.Label("Audio Features", style={'font-family': FONT_FAMILY}),
-                                dcc.Dropdown(
-                                    id='feature-dropdown',
-                                    options=[
-                                        {'label': 'Danceability', 'value': 'danceability'},
-                                        {'label': 'Energy', 'value': 'energy'},
-                                        {'label': 'Speechiness', 'value': 'speechiness'},
-                                        {'label': 'Acousticness', 'value': 'acousticness'},
-                                        {'label': 'Valence', 'value': 'valence'}
-                                    ],
-                                    value=['danceability', 'energy'],
-                                    multi=True,
-                                    style={'font-family': FONT_FAMILY}
-                                )
-                            ])
-                        ]),
-                        html.Br(),
-                        dbc.Row([
-                            dbc.Col([
-                                html.Label("Release Date Range", style={'font-family': FONT_FAMILY}),
-                                dcc.DatePickerRange(
-                                    id='date-range',
-                                    min_date_allowed=df['release_date'].min(),
-                                    max_date_allowed=df['release_date'].max(),
-                                    start_date=df['release_date'].min(),
-                                    end_date=df['release_date'].max(),
-                                    display_format='YYYY-MM-DD'
-                                )
-                            ])
-                        ]),
-                        html.Br(),
-                        dbc.Button(
-                            "Apply Filters",
-                            id='apply-button',
-                            color="primary",
-                            className="w-100",
-                            style={'borderRadius': '50px'}
-                        )
-                    ])
-                ], style={
-                    'borderRadius': '12px',
-                    'backgroundColor': THEMES['dark']['card'],
-                    'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
-                    'height': '100%'
-                })
-            ], md=3),
-            
-            # Visualizations column
-            dbc.Col([
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.CardHeader("Top Tracks by Popularity", style={
-                                'font-family': FONT_FAMILY,
-                                'font-weight': 'bold',
-                                'color': THEMES['dark']['primary'],
-                                'border-bottom': f'1px solid {THEMES["dark"]["muted"]}'
-                            }),
-                            dbc.CardBody([
-                                dcc.Graph(
-                                    id='top-tracks-chart',
-                                    config={'displayModeBar': False}
-                                )
-                            ])
-                        ], style={
-                            'borderRadius': '12px',
-                            'backgroundColor': THEMES['dark']['card'],
-                            'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
-                            'height': '100%'
-                        })
-                    ], md=12, className="mb-4"),
-                    
-                    dbc.Row([
-                        dbc.Col([
-                            dbc.Card([
-                                dbc.CardHeader("Audio Features Radar", style={
-                                    'font-family': FONT_FAMILY,
-                                    'font-weight': 'bold',
-                                    'color': THEMES['dark']['primary'],
-                                    'border-bottom': f'1px solid {THEMES["dark"]["muted"]}'
-                                }),
-                                dbc.CardBody([
-                                    dcc.Graph(
-                                        id='features-radar',
-                                        config={'displayModeBar': False}
+            # Main content
+            dbc.Row([
+                # Filters column
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardHeader("Filters", style={
+                            'font-family': FONT_FAMILY,
+                            'font-weight': 'bold',
+                            'color': THEME_VAR['primary'],
+                            'border-bottom': f"1px solid {THEME_VAR['muted']}"
+                        }),
+                        dbc.CardBody([
+                            dbc.Row([
+                                dbc.Col([
+                                    html.Label("Artists", style={'font-family': FONT_FAMILY}),
+                                    dcc.Dropdown(
+                                        id='artist-dropdown',
+                                        options=[{'label': a, 'value': a} for a in metadata['artists'][:OPTION_LIMIT]],
+                                        multi=True,
+                                        placeholder="All Artists",
+                                        style={'font-family': FONT_FAMILY}
+                                    )
+                                ], md=6),
+                                dbc.Col([
+                                    html.Label("Genres", style={'font-family': FONT_FAMILY}),
+                                    dcc.Dropdown(
+                                        id='genre-dropdown',
+                                        options=[{'label': g, 'value': g} for g in metadata['genres'][:OPTION_LIMIT]],
+                                        multi=True,
+                                        placeholder="All Genres",
+                                        style={'font-family': FONT_FAMILY}
+                                    )
+                                ], md=6)
+                            ]),
+                            html.Br(),
+                            dbc.Row([
+                                dbc.Col([
+                                    html.Label("Audio Features", style={'font-family': FONT_FAMILY}),
+                                    dcc.Dropdown(
+                                        id='feature-dropdown',
+                                        options=[
+                                            {'label': 'Danceability', 'value': 'danceability'},
+                                            {'label': 'Energy', 'value': 'energy'},
+                                            {'label': 'Speechiness', 'value': 'speechiness'},
+                                            {'label': 'Acousticness', 'value': 'acousticness'},
+                                            {'label': 'Valence', 'value': 'valence'}
+                                        ],
+                                        value=['danceability', 'energy'],
+                                        multi=True,
+                                        style={'font-family': FONT_FAMILY}
                                     )
                                 ])
-                            ], style={
-                                'borderRadius': '12px',
-                                'backgroundColor': THEMES['dark']['card'],
-                                'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
-                                'height': '100%'
-                            })
-                        ], md=6, className="mb-4"),
-                        
-                        dbc.Col([
-                            dbc.Card([
-                                dbc.CardHeader("Mood Analysis", style={
-                                    'font-family': FONT_FAMILY,
-                                    'font-weight': 'bold',
-                                    'color': THEMES['dark']['primary'],
-                                    'border-bottom': f'1px solid {THEMES["dark"]["muted"]}'
-                                }),
-                                dbc.CardBody([
-                                    dcc.Graph(
-                                        id='mood-chart',
-                                        config={'displayModeBar': False}
+                            ]),
+                            html.Br(),
+                            dbc.Row([
+                                dbc.Col([
+                                    html.Label("Release Date Range", style={'font-family': FONT_FAMILY}),
+                                    dcc.DatePickerRange(
+                                        id='date-range',
+                                        min_date_allowed=metadata['min_date'],
+                                        max_date_allowed=metadata['max_date'],
+                                        start_date=metadata['min_date'],
+                                        end_date=metadata['max_date'],
+                                        display_format='YYYY-MM-DD'
                                     )
                                 ])
-                            ], style={
-                                'borderRadius': '12px',
-                                'backgroundColor': THEMES['dark']['card'],
-                                'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
-                                'height': '100%'
-                            })
-                        ], md=6, className="mb-4")
-                    ]),
-                    
+                            ]),
+                            html.Br(),
+                            dbc.Button(
+                                "Apply Filters",
+                                id='apply-button',
+                                color="primary",
+                                className="w-100",
+                                style={'borderRadius': '50px'}
+                            ),
+                            dbc.Progress(
+                                id='apply-progress',
+                                value=0,
+                                max=3,
+                                color="success",
+                                style={**APPLY_PROGRESS_STYLE, 'visibility': 'hidden'}
+                            ),
+                            dbc.Row([
+                                dbc.Col(dbc.Button(
+                                    f"Export {fmt.upper() if fmt == 'csv' else fmt.title()}",
+                                    id=f'export-{fmt}',
+                                    href=f'/export?format={fmt}',
+                                    external_link=True,
+                                    color="secondary",
+                                    outline=True,
+                                    size="sm",
+                                    className="w-100",
+                                    style={'borderRadius': '50px'}
+                                ))
+                                for fmt in EXPORT_FORMATS
+                            ], className="g-2 mt-2")
+                        ])
+                    ], style={
+                        'borderRadius': '12px',
+                        'backgroundColor': THEME_VAR['card'],
+                        'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
+                        'height': '100%'
+                    })
+                ], md=3),
+            
+                # Visualizations column
+                dbc.Col([
                     dbc.Row([
                         dbc.Col([
                             dbc.Card([
-                                dbc.CardHeader("Track Previews", style={
+                                dbc.CardHeader("Top Tracks by Popularity", style={
                                     'font-family': FONT_FAMILY,
                                     'font-weight': 'bold',
-                                    'color': THEMES['dark']['primary'],
-                                    'border-bottom': f'1px solid {THEMES["dark"]["muted"]}'
+                                    'color': THEME_VAR['primary'],
+                                    'border-bottom': f"1px solid {THEME_VAR['muted']}"
                                 }),
                                 dbc.CardBody([
-                                    html.Div(id='track-preview-container')
+                                    dcc.Loading(dcc.Graph(
+                                        id='top-tracks-chart',
+                                        config={'displayModeBar': False}
+                                    ), type="circle")
                                 ])
                             ], style={
                                 'borderRadius': '12px',
-                                'backgroundColor': THEMES['dark']['card'],
+                                'backgroundColor': THEME_VAR['card'],
                                 'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
                                 'height': '100%'
                             })
-                        ], md=12)
+                        ], md=12, className="mb-4"),
+                    
+                        dbc.Row([
+                            dbc.Col([
+                                dbc.Card([
+                                    dbc.CardHeader("Audio Features Radar", style={
+                                        'font-family': FONT_FAMILY,
+                                        'font-weight': 'bold',
+                                        'color': THEME_VAR['primary'],
+                                        'border-bottom': f"1px solid {THEME_VAR['muted']}"
+                                    }),
+                                    dbc.CardBody([
+                                        dcc.Loading(dcc.Graph(
+                                            id='features-radar',
+                                            config={'displayModeBar': False}
+                                        ), type="circle")
+                                    ])
+                                ], style={
+                                    'borderRadius': '12px',
+                                    'backgroundColor': THEME_VAR['card'],
+                                    'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
+                                    'height': '100%'
+                                })
+                            ], md=6, className="mb-4"),
+                        
+                            dbc.Col([
+                                dbc.Card([
+                                    dbc.CardHeader("Mood Analysis", style={
+                                        'font-family': FONT_FAMILY,
+                                        'font-weight': 'bold',
+                                        'color': THEME_VAR['primary'],
+                                        'border-bottom': f"1px solid {THEME_VAR['muted']}"
+                                    }),
+                                    dbc.CardBody([
+                                        dcc.Loading(dcc.Graph(
+                                            id='mood-chart',
+                                            config={'displayModeBar': False}
+                                        ), type="circle")
+                                    ])
+                                ], style={
+                                    'borderRadius': '12px',
+                                    'backgroundColor': THEME_VAR['card'],
+                                    'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
+                                    'height': '100%'
+                                })
+                            ], md=6, className="mb-4")
+                        ]),
+
+                        dbc.Row([
+                            dbc.Col([
+                                dbc.Card([
+                                    dbc.CardHeader("Release Trends", style={
+                                        'font-family': FONT_FAMILY,
+                                        'font-weight': 'bold',
+                                        'color': THEME_VAR['primary'],
+                                        'border-bottom': f"1px solid {THEME_VAR['muted']}"
+                                    }),
+                                    dbc.CardBody([
+                                        dbc.Row([
+                                            dbc.Col([
+                                                dbc.RadioItems(
+                                                    id='trends-metric',
+                                                    options=[
+                                                        {'label': 'Tracks', 'value': 'count'},
+                                                        {'label': 'Popularity', 'value': 'popularity'},
+                                                        {'label': 'Audio Features', 'value': 'features'}
+                                                    ],
+                                                    value='count',
+                                                    inline=True,
+                                                    label_style={'font-family': FONT_FAMILY}
+                                                )
+                                            ], md=8),
+                                            dbc.Col([
+                                                dbc.RadioItems(
+                                                    id='trends-granularity',
+                                                    options=[{'label': g.capitalize(), 'value': g} for g in GRANULARITIES],
+                                                    value='month',
+                                                    inline=True,
+                                                    label_style={'font-family': FONT_FAMILY}
+                                                )
+                                            ], md=4)
+                                        ], className="mb-2"),
+                                        dcc.Loading(dcc.Graph(
+                                            id='trends-chart',
+                                            config={'displayModeBar': False}
+                                        ), type="circle")
+                                    ])
+                                ], style={
+                                    'borderRadius': '12px',
+                                    'backgroundColor': THEME_VAR['card'],
+                                    'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
+                                    'height': '100%'
+                                })
+                            ], md=12, className="mb-4")
+                        ]),
+                    
+                        dbc.Row([
+                            dbc.Col([
+                                dbc.Card([
+                                    dbc.CardHeader("Track Previews", style={
+                                        'font-family': FONT_FAMILY,
+                                        'font-weight': 'bold',
+                                        'color': THEME_VAR['primary'],
+                                        'border-bottom': f"1px solid {THEME_VAR['muted']}"
+                                    }),
+                                    dbc.CardBody([
+                                        dcc.Loading(html.Div(id='track-preview-container'), type="circle")
+                                    ])
+                                ], style={
+                                    'borderRadius': '12px',
+                                    'backgroundColor': THEME_VAR['card'],
+                                    'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
+                                    'height': '100%'
+                                })
+                            ], md=12, className="mb-4")
+                        ]),
+
+                        dbc.Row([
+                            dbc.Col([
+                                dbc.Card([
+                                    dbc.CardHeader("Similar Tracks", style={
+                                        'font-family': FONT_FAMILY,
+                                        'font-weight': 'bold',
+                                        'color': THEME_VAR['primary'],
+                                        'border-bottom': f"1px solid {THEME_VAR['muted']}"
+                                    }),
+                                    dbc.CardBody([
+                                        dbc.Row([
+                                            dbc.Col([
+                                                dcc.Dropdown(
+                                                    id='similar-track-dropdown',
+                                                    placeholder="Pick a track, or click a bar in Top Tracks",
+                                                    style={'font-family': FONT_FAMILY}
+                                                )
+                                            ], md=8),
+                                            dbc.Col([
+                                                dbc.Switch(
+                                                    id='similar-within-filters',
+                                                    label="Within current filters",
+                                                    value=True,
+                                                    label_style={'font-family': FONT_FAMILY}
+                                                )
+                                            ], md=4)
+                                        ], className="mb-2"),
+                                        dcc.Loading(html.Div(id='similar-tracks-container'), type="circle")
+                                    ])
+                                ], style={
+                                    'borderRadius': '12px',
+                                    'backgroundColor': THEME_VAR['card'],
+                                    'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
+                                    'height': '100%'
+                                })
+                            ], md=12, className="mb-4")
+                        ]),
+
+                        dbc.Row([
+                            dbc.Col([
+                                dbc.Card([
+                                    dbc.CardHeader("Search Tracks", style={
+                                        'font-family': FONT_FAMILY,
+                                        'font-weight': 'bold',
+                                        'color': THEME_VAR['primary'],
+                                        'border-bottom': f"1px solid {THEME_VAR['muted']}"
+                                    }),
+                                    dbc.CardBody([
+                                        # debounce: the search runs once typing pauses, not on every keystroke
+                                        dcc.Input(
+                                            id='track-search',
+                                            type='search',
+                                            debounce=SEARCH_DEBOUNCE_SECONDS,
+                                            placeholder="Search song titles and artists, e.g. ishq or diljit",
+                                            className="form-control mb-2",
+                                            style={'font-family': FONT_FAMILY}
+                                        ),
+                                        dcc.Loading(html.Div(id='search-results-container'), type="circle"),
+                                        dbc.Pagination(
+                                            id='search-pagination',
+                                            max_value=1,
+                                            active_page=1,
+                                            fully_expanded=False,
+                                            previous_next=True,
+                                            className="mt-2 mb-0"
+                                        )
+                                    ])
+                                ], style={
+                                    'borderRadius': '12px',
+                                    'backgroundColor': THEME_VAR['card'],
+                                    'boxShadow': '0 4px 20px rgba(0, 0, 0, 0.1)',
+                                    'height': '100%'
+                                })
+                            ], md=12)
+                        ])
                     ])
-                ])
-            ], md=9)
-        ])
-    ], id='main-container', style={
-        'backgroundColor': THEMES['dark']['background'],
-        'color': THEMES['dark']['text'],
-        'fontFamily': FONT_FAMILY,
-        'minHeight': '100vh',
-        'padding': '20px'
-    })
-])
+                ], md=9)
+            ])
+        ], id='main-container', style=container_style('dark'))
+    ])
+
+layout_cache = {}
+
+def serve_layout():
+    """Layout for a page load, rebuilt only when the catalog metadata changes"""
+    metadata = catalog_metadata()
+    key = json.dumps([metadata['source'], metadata['rows']])
+    if key not in layout_cache:
+        layout_cache.clear()
+        layout_cache[key] = build_layout(metadata)
+    return layout_cache[key]
+
+# Every component id without waiting for the catalog: Dash validates callbacks against it
+app.validation_layout = build_layout({
+    'source': None, 'rows': 0, 'artists': [], 'genres': [], 'min_date': None, 'max_date': None,
+    'aggregate': {'count': 0, 'sums': {}, 'mood_counts': {}, 'genre_counts': {}}
+})
+app.layout = serve_layout
 
 # ========== CALLBACKS ==========
-@app.callback(
+# Theme switching runs in the browser: no server round trip, no figure rebuild
+app.clientside_callback(
+    "function(darkMode) { return darkMode ? 'dark' : 'light'; }",
     Output('theme-store', 'data'),
     Input('theme-toggle', 'value')
 )
-def update_theme(dark_mode):
-    return 'dark' if dark_mode else 'light'
 
-@app.callback(
+app.clientside_callback(
+    """
+    function(theme) {
+        const styles = %s;
+        return [styles[theme], theme === 'dark' ? 'Dark Mode' : 'Light Mode'];
+    }
+    """ % json.dumps({theme: container_style(theme) for theme in THEMES}),
     Output('main-container', 'style'),
     Output('theme-toggle', 'label'),
     Input('theme-store', 'data')
 )
-def apply_theme(theme):
-    theme_data = THEMES[theme]
-    container_style = {
-        'backgroundColor': theme_data['background'],
-        'color': theme_data['text'],
-        'fontFamily': FONT_FAMILY,
-        'minHeight': '100vh',
-        'padding': '20px'
+
+THEME_FIGURE_JS = """
+function(figure, theme) {
+    if (!figure) {
+        return window.dash_clientside.no_update;
+    }
+    const layouts = %s;
+    const merge = (base, extra) => {
+        const out = Object.assign({}, base);
+        for (const key in extra) {
+            const value = extra[key];
+            const nested = value && typeof value === 'object' && !Array.isArray(value);
+            out[key] = nested ? merge(base[key] || {}, value) : value;
+        }
+        return out;
+    };
+    return Object.assign({}, figure, {layout: merge(figure.layout || {}, layouts[theme])});
+}
+""" % json.dumps(THEME_LAYOUTS)
+
+for graph in ['top-tracks-chart', 'features-radar', 'mood-chart', 'trends-chart']:
+    app.clientside_callback(
+        THEME_FIGURE_JS,
+        Output(graph, 'figure'),
+        Input(f'{graph}-data', 'data'),
+        Input('theme-store', 'data')
+    )
+
+@app.callback(
+    Output('date-range', 'min_date_allowed'),
+    Output('date-range', 'max_date_allowed'),
+    Output('date-range', 'start_date'),
+    Output('date-range', 'end_date'),
+    Output('catalog-version', 'data'),
+    Input('catalog-poll', 'n_intervals'),
+    State('catalog-version', 'data'),
+    State('date-range', 'min_date_allowed'),
+    State('date-range', 'max_date_allowed'),
+    State('date-range', 'start_date'),
+    State('date-range', 'end_date'),
+    prevent_initial_call=True
+)
+def refresh_catalog_options(n_intervals, version, min_date, max_date, start_date, end_date):
+    """Pick up release dates added by ingestion; a new version also refreshes the dropdown options.
+
+    A range still at the old catalog bounds (the default) widens to the new
+    ones, so ingested releases are part of the next Apply; a range the
+    user picked is kept.
+    """
+    if not catalog_ready.is_set() or version == len(df):
+        raise PreventUpdate
+    metadata = live_metadata(len(df))
+    at_start = canonical_date(start_date) == canonical_date(min_date)
+    at_end = canonical_date(end_date) == canonical_date(max_date)
+    return (
+        metadata['min_date'],
+        metadata['max_date'],
+        metadata['min_date'] if at_start else dash.no_update,
+        metadata['max_date'] if at_end else dash.no_update,
+        metadata['rows']
+    )
+
+@lru_cache(maxsize=1)
+def option_indexes(version):
+    """Prefix indexes of the artist and genre names; `version` is the catalog size"""
+    with catalog_lock:
+        return {'artist': PrefixIndex(filter_engine.artists), 'genre': PrefixIndex(genre_index.genres)}
+
+def dropdown_options(kind, search, version, selected):
+    """Options of the artist or genre dropdown matching what the user typed"""
+    catalog_ready.wait()
+    values = option_indexes(len(df))[kind].match(search, OPTION_LIMIT)
+    # Selected values must stay among the options, or the dropdown drops them
+    kept = [value for value in selected or [] if value not in values]
+    return [{'label': value, 'value': value} for value in kept + values]
+
+for kind in ('artist', 'genre'):
+    app.callback(
+        Output(f'{kind}-dropdown', 'options'),
+        Input(f'{kind}-dropdown', 'search_value'),
+        Input('catalog-version', 'data'),
+        State(f'{kind}-dropdown', 'value'),
+        prevent_initial_call=True
+    )(partial(dropdown_options, kind))
+
+# ========== FILTER SELECTION ==========
+# Apply runs the heavy part once: the filter bitmap, the cube aggregate and
+# the top-K walk. The result (the normalized filters, the aggregate and the
+# top row ids) goes to `selection-store`, and each panel renders from it.
+# When diskcache is installed this stage runs as a background job, so a
+# broad filter over a large catalog does not hold up the web worker.
+def compute_selection(selection, set_progress=None):
+    """Aggregate and top rows of a normalized selection, reporting (step, steps) progress"""
+    def progress(step):
+        if set_progress is not None:
+            set_progress((step, 3))
+
+    artists, genres = selection['artists'], selection['genres']
+    start_date, end_date = selection['start_date'], selection['end_date']
+    progress(0)
+    # One hold for the three steps: the bitmap must match the rank index it walks
+    with catalog_lock:
+        with stage_seconds.time(stage='filter', panel='selection'):
+            bitmap = filter_engine.select_bitmap(artists, genres, start_date, end_date)
+        progress(1)
+        with stage_seconds.time(stage='aggregate', panel='selection'):
+            agg = cube.query(artists, genres, start_date, end_date)
+        progress(2)
+        with stage_seconds.time(stage='top_k', panel='selection'):
+            top_rows = rank_indexes['popularity'].top(10, bitmap)
+    progress(3)
+    return {'selection': selection, 'aggregate': agg.to_dict(), 'top_rows': top_rows.tolist()}
+
+def cached_panel(panel, compute, *parts):
+    """Result of `compute()` from the panel's own cache, keyed by `parts`.
+
+    `compute` takes the catalog lock itself if it reads the catalog or its
+    indexes; panels built from the staged aggregate (radar, mood, KPIs) do
+    not wait for an Apply or an ingest in progress.
+    """
+    cache = panel_caches[panel]
+    key = cache_key(panel, *parts)
+    with stage_seconds.time(stage='cache_get', panel=panel):
+        result = cache.get(key)
+    if result is None:
+        with stage_seconds.time(stage='build', panel=panel):
+            result = compute()
+        with stage_seconds.time(stage='serialize', panel=panel):
+            panel_payload_bytes[panel] = payload_bytes(result)
+        panel_payload.observe(panel_payload_bytes[panel], panel=panel)
+        with stage_seconds.time(stage='cache_set', panel=panel):
+            cache.set(key, result)
+    return result
+
+def applied_selection(artists, genres, start_date, end_date):
+    selection = normalize_selection(artists, genres, start_date, end_date)
+    # The catalog size versions the selection, so ingested tracks never hit stale results
+    selection['version'] = len(df)
+    return selection
+
+def stage_selection(set_progress, n_clicks, artists, genres, start_date, end_date):
+    catalog_ready.wait()
+    selection = applied_selection(artists, genres, start_date, end_date)
+    return cached_panel('selection', lambda: compute_selection(selection, set_progress), selection)
+
+STAGE_DEPENDENCIES = [
+    Output('selection-store', 'data'),
+    Input('apply-button', 'n_clicks'),
+    State('artist-dropdown', 'value'),
+    State('genre-dropdown', 'value'),
+    State('date-range', 'start_date'),
+    State('date-range', 'end_date')
+]
+
+if background_manager is not None:
+    # Dash terminates the running job when Apply is clicked again (the
+    # renderer sends the superseded job id along with the new request)
+    app.callback(
+        *STAGE_DEPENDENCIES,
+        background=True,
+        manager=background_manager,
+        progress=[Output('apply-progress', 'value'), Output('apply-progress', 'max')],
+        running=[(
+            Output('apply-progress', 'style'),
+            {**APPLY_PROGRESS_STYLE, 'visibility': 'visible'},
+            {**APPLY_PROGRESS_STYLE, 'visibility': 'hidden'}
+        )]
+    )(stage_selection)
+else:
+    app.callback(*STAGE_DEPENDENCIES)(partial(stage_selection, None))
+
+# The export buttons download the applied filters (see /export)
+app.clientside_callback(
+    """
+    function(staged) {
+        const formats = %s;
+        const selection = (staged && staged.selection) || {};
+        return formats.map(format => {
+            const params = new URLSearchParams({format: format});
+            (selection.artists || []).forEach(artist => params.append('artist', artist));
+            (selection.genres || []).forEach(genre => params.append('genre', genre));
+            ['start_date', 'end_date'].forEach(key => {
+                if (selection[key]) {
+                    params.append(key, selection[key]);
+                }
+            });
+            return '/export?' + params.toString();
+        });
     }
-    toggle_label = "Dark Mode" if theme == 'dark' else "Light Mode"
-    return container_style, toggle_label
+    """ % json.dumps(list(EXPORT_FORMATS)),
+    *[Output(f'export-{fmt}', 'href') for fmt in EXPORT_FORMATS],
+    Input('selection-store', 'data')
+)
+
+# ========== PANEL CALLBACKS ==========
+@app.callback(
+    Output('top-tracks-chart-data', 'data'),
+    Input('selection-store', 'data')
+)
+def update_top_tracks(staged):
+    if staged is None:
+        raise PreventUpdate
+    return cached_panel('top-tracks', lambda: top_tracks_figure(staged['top_rows']), staged['selection'])
+
+@app.callback(
+    Output('features-radar-data', 'data'),
+    Input('selection-store', 'data'),
+    Input('feature-dropdown', 'value')
+)
+def update_radar(staged, features):
+    if staged is None:
+        raise PreventUpdate
+    return cached_panel(
+        'radar',
+        lambda: radar_figure(Aggregate.from_dict(staged['aggregate']), features),
+        staged['selection'], features or []
+    )
+
+@app.callback(
+    Output('mood-chart-data', 'data'),
+    Input('selection-store', 'data')
+)
+def update_mood(staged):
+    if staged is None:
+        raise PreventUpdate
+    return cached_panel('mood', lambda: mood_figure(Aggregate.from_dict(staged['aggregate'])), staged['selection'])
+
+@app.callback(
+    Output('trends-chart-data', 'data'),
+    Input('selection-store', 'data'),
+    Input('trends-granularity', 'value'),
+    Input('trends-metric', 'value'),
+    Input('feature-dropdown', 'value')
+)
+def update_trends(staged, granularity, metric, features):
+    if staged is None:
+        raise PreventUpdate
+    features = (features or []) if metric == 'features' else []  # only the features metric plots them
+    return cached_panel(
+        'trends',
+        lambda: trends_figure(staged['selection'], granularity, metric, features),
+        staged['selection'], granularity, metric, features
+    )
 
 @app.callback(
-    Output('top-tracks-chart', 'figure'),
-    Output('features-radar', 'figure'),
-    Output('mood-chart', 'figure'),
     Output('track-preview-container', 'children'),
+    Input('selection-store', 'data')
+)
+def update_previews(staged):
+    if staged is None:
+        raise PreventUpdate
+    return cached_panel('previews', lambda: track_previews(staged['top_rows'][:3]), staged['selection'])
+
+@app.callback(
     Output('kpi-total-tracks', 'children'),
     Output('kpi-avg-popularity', 'children'),
     Output('kpi-avg-duration', 'children'),
     Output('kpi-top-genre', 'children'),
     Output('kpi-explicit-pct', 'children'),
     Output('kpi-energy-index', 'children'),
-    Input('apply-button', 'n_clicks'),
-    State('artist-dropdown', 'value'),
-    State('genre-dropdown', 'value'),
-    State('feature-dropdown', 'value'),
-    State('date-range', 'start_date'),
-    State('date-range', 'end_date'),
-    State('theme-store', 'data')
+    Input('selection-store', 'data')
 )
-def update_dashboard(n_clicks, artists, genres, features, start_date, end_date, theme):
-    # Filter data
-    filtered_df = df.copy()
-    
-    # Apply filters
-    if artists:
-        filtered_df = filtered_df[filtered_df['artist'].isin(artists)]
-    if genres:
-        genre_mask = filtered_df['artist_genres'].apply(lambda x: any(g in x for g in genres))
-        filtered_df = filtered_df[genre_mask]
-    if start_date and end_date:
-        filtered_df = filtered_df[
-            (filtered_df['release_date'] >= start_date) & 
-            (filtered_df['release_date'] <= end_date)
-        ]
-    
-    theme_data = THEMES[theme]
-    
-    # 1. Top Tracks Chart
-    top_tracks_fig = px.bar(
-        filtered_df.nlargest(10, 'popularity'),
-        x='name', y='popularity', color='artist',
-        template='plotly_dark' if theme == 'dark' else 'plotly_white',
-        hover_data=['duration_min', 'artist_genres']
-    ).update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font={'family': FONT_FAMILY},
+def update_kpis(staged):
+    if staged is None:
+        raise PreventUpdate
+    return cached_panel('kpis', lambda: kpi_values(Aggregate.from_dict(staged['aggregate'])), staged['selection'])
+
+@app.callback(
+    Output('similar-track-dropdown', 'options'),
+    Output('similar-track-dropdown', 'value'),
+    Input('selection-store', 'data'),
+    Input('top-tracks-chart', 'clickData'),
+    State('similar-track-dropdown', 'value')
+)
+def update_similar_choices(staged, click, track):
+    """Offer the top tracks of the selection; clicking a Top Tracks bar picks its track"""
+    if staged is None:
+        raise PreventUpdate
+    rows = staged['top_rows']
+    if dash.ctx.triggered_id == 'top-tracks-chart' and click:
+        track = click['points'][0]['customdata']
+    elif track not in rows:
+        track = rows[0] if rows else None
+    with catalog_lock:
+        tracks = select_columns(['name', 'artist'], rows)
+    options = [
+        {'label': f"{name} - {artist}", 'value': row}
+        for row, name, artist in zip(rows, tracks['name'].astype(str), tracks['artist'].astype(str))
+    ]
+    return options, track
+
+@app.callback(
+    Output('similar-tracks-container', 'children'),
+    Input('similar-track-dropdown', 'value'),
+    Input('similar-within-filters', 'value'),
+    Input('selection-store', 'data')
+)
+def update_similar(track, within_filters, staged):
+    if track is None or staged is None:
+        raise PreventUpdate
+    selection = staged['selection']
+    return cached_panel(
+        'similar',
+        lambda: similar_tracks(track, selection if within_filters else None),
+        selection, track, bool(within_filters)
+    )
+
+@app.callback(
+    Output('search-results-container', 'children'),
+    Output('search-pagination', 'max_value'),
+    Output('search-pagination', 'active_page'),
+    Input('track-search', 'value'),
+    Input('search-pagination', 'active_page')
+)
+def update_search(query, page):
+    """A page of the tracks matching the search box; a new query starts from page 1"""
+    if not query or not query.strip():
+        return [], 1, 1
+    if dash.ctx.triggered_id != 'search-pagination' or not page:
+        page = 1
+    catalog_ready.wait()
+    # The catalog size versions the results, like the selection
+    results, total = cached_panel('search', lambda: search_tracks(query, page), query, page, len(df))
+    return results, max(1, -(-total // SEARCH_PAGE_SIZE)), page
+
+# ========== PANEL BUILDERS ==========
+# Figures are minimal, theme-neutral dicts (see figures.py); THEME_FIGURE_JS
+# applies the theme colours in the browser
+def top_tracks_figure(top_rows):
+    with catalog_lock:
+        tracks = select_columns(['name', 'popularity', 'artist', 'duration_min', 'artist_genres'], top_rows)
+    hovertext = [
+        f"{duration:.1f} min<br>{genres}"
+        for duration, genres in zip(tracks['duration_min'].astype(float), tracks['artist_genres'].astype(str))
+    ]
+    return grouped_bar(
+        tracks['name'].astype(str), tracks['popularity'], tracks['artist'].astype(str), hovertext,
+        customdata=list(top_rows),  # row ids, for picking a track to find similar ones
         margin={'t': 0},
-        xaxis={'title': None, 'categoryorder': 'total descending'},
-        yaxis={'title': None},
+        xaxis={'categoryorder': 'total descending'},
         legend={'orientation': 'h', 'y': -0.2}
     )
-    
-    # 2. Features Radar Chart
-    features_fig = go.Figure()
-    if features:
-        avg_features = filtered_df[features].mean()
-        features_fig.add_trace(go.Scatterpolar(
-            r=avg_features.values,
-            theta=features,
-            fill='toself',
-            line_color=theme_data['primary']
-        ))
-    features_fig.update_layout(
-        polar=dict(
-            radialaxis=dict(visible=True, range=[0, 1]),
-            bgcolor='rgba(0,0,0,0)'
-        ),
-        paper_bgcolor='rgba(0,0,0,0)',
-        font={'family': FONT_FAMILY},
+
+def radar_figure(agg, features):
+    return polar_area(
+        [agg.mean(f) for f in features or []], features or [],
+        THEMES['dark']['primary'],  # same accent in both themes
+        polar={'radialaxis': {'visible': True, 'range': [0, 1]}, 'bgcolor': TRANSPARENT},
         margin={'t': 0},
         showlegend=False
     )
-    
-    # 3. Mood Chart
-    mood_fig = px.pie(
-        filtered_df,
-        names='mood',
-        hole=0.4,
-        color_discrete_sequence=[
-            theme_data['muted'], 
-            theme_data['primary'], 
-            theme_data['secondary']
-        ]
-    ).update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font={'family': FONT_FAMILY},
+
+def mood_figure(agg):
+    # The cube already counted the moods: three values, no rows. Slice
+    # colours come from the theme's piecolorway
+    return donut(
+        agg.mood_counts.index, agg.mood_counts.values,
         margin={'t': 0, 'b': 0, 'l': 0, 'r': 0},
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.2,
-            xanchor="center",
-            x=0.5
+        legend={'orientation': 'h', 'yanchor': 'bottom', 'y': -0.2, 'xanchor': 'center', 'x': 0.5}
+    )
+
+def trends_figure(selection, granularity, metric, features):
+    """Track count, mean popularity or mean audio features per day, week or month of the selection"""
+    with catalog_lock, stage_seconds.time(stage='rollup', panel='trends'):
+        trend = trend_cube.query(
+            selection['artists'], selection['genres'], selection['start_date'], selection['end_date'], granularity
         )
+    periods = trend.index.strftime('%Y-%m-%d')
+    layout = {'margin': {'t': 0}, 'hovermode': 'x unified', 'xaxis': {'type': 'date'}}
+    if metric == 'count':
+        return time_series(periods, {'Tracks': trend['count']}, bars=True, **layout)
+    columns = ['popularity'] if metric == 'popularity' else [f for f in features if f in trend]
+    return time_series(
+        periods, {c.capitalize(): trend[c] for c in columns},
+        legend={'orientation': 'h', 'y': -0.2}, **layout
     )
-    
-    # 4. Track Previews
-    previews = []
-    for _, row in filtered_df.nlargest(3, 'popularity').iterrows():
-        previews.append(create_track_preview(
-            row['image_url'],
+
+def track_previews(rows):
+    with catalog_lock:
+        tracks = df.take(rows)
+    return [
+        create_track_preview(
+            track_image_url(row),
             row['name'],
             row['artist'],
-            row['preview_url'],
-            theme
-        ))
-    
-    # 5. Calculate KPIs
-    total_tracks = len(filtered_df)
-    avg_popularity = round(filtered_df['popularity'].mean(), 1)
-    avg_duration = f"{round(filtered_df['duration_min'].mean(), 1)} min"
-    
-    # Get top genre
-    genre_list = filtered_df['artist_genres'].str.split(', ').explode()
-    top_genre = genre_list.value_counts().index[0] if not genre_list.empty else "N/A"
-    
-    # Explicit content percentage
-    explicit_pct = round((filtered_df['explicit'].mean() * 100), 1)
-    
-    # Energy index (custom metric)
-    energy_index = round(filtered_df['energy'].mean() * 100, 1)
-    
-    return (
-        top_tracks_fig,
-        features_fig,
-        mood_fig,
-        previews,
-        total_tracks,
-        avg_popularity,
-        avg_duration,
-        top_genre,
-        f"{explicit_pct}%",
-        f"{energy_index}"
+            track_preview_url(row)
+        )
+        for _, row in tracks.iterrows()
+    ]
+
+def similar_tracks(row, selection=None):
+    """The 10 tracks that sound most like `row`, within the filters of `selection` if given"""
+    with catalog_lock:
+        bitmap = None
+        if selection is not None:
+            bitmap = filter_engine.select_bitmap(
+                selection['artists'], selection['genres'], selection['start_date'], selection['end_date']
+            )
+        with stage_seconds.time(stage='neighbours', panel='similar'):
+            rows, scores = similarity_index.neighbours(row, 10, bitmap)
+        tracks = select_columns(['name', 'artist'], rows)
+    if not len(rows):
+        return html.P("No similar tracks match the current filters", style={
+            'color': THEME_VAR['muted'],
+            'fontFamily': FONT_FAMILY
+        })
+    return [
+        create_track_row(name, artist, f"{score:.0%}", "Similarity")
+        for name, artist, score in zip(tracks['name'].astype(str), tracks['artist'].astype(str), scores)
+    ]
+
+def search_tracks(query, page):
+    """Page `page` of the tracks matching `query`, most popular first, and the number of matches"""
+    with catalog_lock:
+        with stage_seconds.time(stage='search', panel='search'):
+            rows, total = search_index.search(
+                query, rank_indexes['popularity'], (page - 1) * SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE
+            )
+        tracks = select_columns(['name', 'artist', 'popularity'], rows)
+    if not total:
+        return html.P("No tracks match this search (type at least two letters)", style={
+            'color': THEME_VAR['muted'],
+            'fontFamily': FONT_FAMILY
+        }), 0
+    results = [
+        create_track_row(name, artist, f"{popularity:.0f}", "Popularity")
+        for name, artist, popularity in zip(
+            tracks['name'].astype(str), tracks['artist'].astype(str), tracks['popularity'].astype(float)
+        )
+    ]
+    return [html.Small(f"{total:,} matching tracks", style={
+        'color': THEME_VAR['muted'],
+        'fontFamily': FONT_FAMILY
+    })] + results, total
+
+# ========== EXPORT ==========
+# /export?format=csv|parquet&artist=...&genre=...&start_date=...&end_date=...
+# streams the rows matching the filters. Rows are read and serialized one
+# chunk at a time, so an export of millions of rows never holds the filtered
+# frame; the catalog lock is held only while a chunk is read, so other
+# requests (and ingestion) go on during a long download.
+@server.route('/export')
+def export_rows():
+    args = flask.request.args
+    fmt = args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return {'error': f"Unknown format {fmt!r}; use one of {sorted(EXPORT_FORMATS)}"}, 400
+    if fmt == 'parquet' and pq is None:
+        return {'error': "Parquet export needs pyarrow"}, 400
+    try:
+        selection = normalize_selection(
+            args.getlist('artist'), args.getlist('genre'), args.get('start_date'), args.get('end_date')
+        )
+    except ValueError:
+        return {'error': "start_date and end_date must be dates, e.g. 2024-01-31"}, 400
+    catalog_ready.wait()
+    with catalog_lock:
+        # Rows ingested after this point are not part of the export
+        frame, size = df, len(df)
+        bitmap = filter_engine.select_bitmap(
+            selection['artists'], selection['genres'], selection['start_date'], selection['end_date']
+        )
+
+    def frames():
+        for rows in row_chunks(bitmap, size):
+            with catalog_lock, stage_seconds.time(stage='export_read', panel='export'):
+                part = frame.take(rows)
+            yield catalog_rows(part)
+
+    chunks = csv_chunks(frames()) if fmt == 'csv' else parquet_chunks(frames())
+    return flask.Response(
+        flask.stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename=tracks.{fmt}'}
     )
 
+# ========== STARTUP ==========
+start_catalog_load()
+
 if __name__ == '__main__':
     app.run(debug=True, port=8080)
\ No newline at end of file